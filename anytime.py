@@ -0,0 +1,142 @@
+import threading
+import time
+import tkinter as tk
+from tkinter import simpledialog, messagebox
+
+import compact
+
+# Anytime max flow: Dinic phases that keep a lower and an upper bound on the
+# answer while they run. The lower bound is the flow pushed so far. The upper
+# bound is the smallest cut seen so far: every BFS phase gives one cut per
+# level (the nodes up to that level), whose capacity is the current flow plus
+# the residual capacity crossing it.
+
+
+# Stops when the flow reaches target or the best cut proves it cannot, when
+# the bounds are within gap of each other (relative to the upper bound), after
+# time_budget seconds, or when the stop event is set. progress(lower, upper)
+# is called at most every progress_interval seconds and once at the end.
+# Returns a dict with lower, upper, status and the residual capacities res.
+def anytime_max_flow(cg, s, t, target=None, gap=None, time_budget=None,
+                     progress=None, stop=None, progress_interval=0.1):
+    res = cg.cap.tolist()
+    lower = 0
+    upper = min(sum(res[cg.start[s]:cg.start[s + 1]]),
+                sum(res[a] for a in cg.rev[cg.start[t]:cg.start[t + 1]]))
+    if s == t:
+        upper = 0
+    begin = last_report = time.perf_counter()
+
+    def reason_to_stop():
+        if lower == upper:
+            return 'optimal'
+        if target is not None and lower >= target:
+            return 'target reached'
+        if target is not None and upper < target:
+            return 'target unreachable'
+        if gap is not None and upper - lower <= gap * upper:
+            return 'gap reached'
+        if time_budget is not None and time.perf_counter() - begin >= time_budget:
+            return 'time budget used'
+        if stop is not None and stop.is_set():
+            return 'stopped'
+        return None
+
+    status = reason_to_stop()
+    while status is None:
+        level, layer_cut = compact.residual_levels(cg, s, res)
+        if level[t] < 0:  # No augmenting path found
+            upper = lower
+        else:
+            upper = min(upper, lower + min(layer_cut[:level[t]]))
+        status = reason_to_stop()
+
+        if status is None:
+            for path_flow in compact.blocking_flow(cg, s, t, res, level):
+                lower += path_flow
+                status = reason_to_stop()
+                if status is not None:
+                    break
+                if progress is not None and time.perf_counter() - last_report >= progress_interval:
+                    progress(lower, upper)
+                    last_report = time.perf_counter()
+
+    if progress is not None:
+        progress(lower, upper)
+    return {'lower': lower, 'upper': upper, 'status': status, 'res': res}
+
+
+# Same on a networkx graph, returns (lower bound, upper bound, status)
+def anytime(graph, source, sink, **options):
+    cg = compact.from_networkx(graph)
+    result = anytime_max_flow(cg, cg.index[source], cg.index[sink], **options)
+    return result['lower'], result['upper'], result['status']
+
+
+def bounds_text(lower, upper):
+    gap = (upper - lower) / upper * 100 if upper else 0.0
+    return f"Lower bound: {lower}    Upper bound: {upper}    Gap: {gap:.2f}%"
+
+
+def optional_number(prompt, kind=float):
+    answer = simpledialog.askstring("Input", prompt)
+    return kind(answer) if answer and answer.strip() else None
+
+
+# GUI that solves in a background thread and shows the bounds as they tighten
+def visualize_anytime():
+    root = tk.Tk()
+    root.withdraw()
+
+    try:
+        edges_input = simpledialog.askstring("Input", "Enter the edges with capacities (e.g., A-B-10, B-C-5, C-D-10):")
+        source = simpledialog.askstring("Input", "Enter the source node:").strip()
+        sink = simpledialog.askstring("Input", "Enter the sink node:").strip()
+        target = optional_number("Stop once the flow reaches (leave empty for none):", int)
+        gap = optional_number("Stop once the gap is below, in percent (leave empty for none):")
+        time_budget = optional_number("Stop after this many seconds (leave empty for none):")
+
+        cg = compact.from_edge_list(compact.parse_edges(edges_input))
+        s, t = cg.index[source], cg.index[sink]
+    except Exception as e:
+        messagebox.showerror("Error", f"An error occurred: {e}")
+        root.destroy()
+        return
+
+    result_window = tk.Toplevel(root)
+    result_window.title("Anytime Maximum Flow")
+    bounds_label = tk.Label(result_window, text=bounds_text(0, 0), font=("Helvetica", 14))
+    bounds_label.pack(padx=20, pady=10)
+    status_label = tk.Label(result_window, text="Solving...", font=("Helvetica", 12))
+    status_label.pack(pady=5)
+
+    stop = threading.Event()
+    stop_button = tk.Button(result_window, text="Stop", command=stop.set)
+    stop_button.pack(pady=10)
+    result_window.protocol("WM_DELETE_WINDOW", lambda: (stop.set(), root.destroy()))
+
+    # The solver thread only stores the bounds; Tk widgets are updated from the Tk thread
+    latest = {'bounds': (0, 0), 'result': None}
+
+    def solve():
+        latest['result'] = anytime_max_flow(
+            cg, s, t, target=target, gap=gap / 100 if gap is not None else None,
+            time_budget=time_budget, stop=stop,
+            progress=lambda lower, upper: latest.update(bounds=(lower, upper)))
+
+    def refresh():
+        bounds_label.config(text=bounds_text(*latest['bounds']))
+        result = latest['result']
+        if result is None:
+            root.after(100, refresh)
+            return
+        status_label.config(text=f"Finished: {result['status']}")
+        stop_button.config(state=tk.DISABLED)
+
+    threading.Thread(target=solve, daemon=True).start()
+    refresh()
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    visualize_anytime()
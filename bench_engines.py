@@ -0,0 +1,83 @@
+import argparse
+import random
+import time
+
+import numpy as np
+
+import compact
+from boykov_kolmogorov import grid_graph
+from engines import ENGINES, graph_stats, choose_engine
+
+# Timings behind the rules in engines.choose_engine: every registered engine on
+# a few families of random networks, smallest to largest.
+
+
+def random_network(n, m, max_cap, rng):
+    edges = [(rng.randrange(n), rng.randrange(n), rng.randint(1, max_cap)) for _ in range(m)]
+    return compact.from_edge_list(edges, range(n)), 0, n - 1
+
+
+def layered_network(layers, width, max_cap, rng):
+    n = layers * width + 2
+    edges = [(0, 1 + i, rng.randint(1, max_cap)) for i in range(width)]
+    for layer in range(layers - 1):
+        for i in range(width):
+            for j in rng.sample(range(width), min(3, width)):
+                edges.append((1 + layer * width + i, 1 + (layer + 1) * width + j, rng.randint(1, max_cap)))
+    edges += [(1 + (layers - 1) * width + i, n - 1, rng.randint(1, max_cap)) for i in range(width)]
+    return compact.from_edge_list(edges, range(n)), 0, n - 1
+
+
+def matching_network(left, right, degree, rng):
+    n = left + right + 2
+    edges = [(0, 1 + i, 1) for i in range(left)]
+    for i in range(left):
+        for j in rng.sample(range(right), min(degree, right)):
+            edges.append((1 + i, 1 + left + j, 1))
+    edges += [(1 + left + j, n - 1, 1) for j in range(right)]
+    return compact.from_edge_list(edges, range(n)), 0, n - 1
+
+
+def segmentation_grid(size, rng):
+    generator = np.random.default_rng(rng.randrange(2**32))
+    return grid_graph(generator.integers(0, 10, (size, size - 1)), generator.integers(0, 10, (size - 1, size)),
+                      generator.integers(0, 20, (size, size)), generator.integers(0, 20, (size, size)))
+
+
+def families(rng):
+    for n, m in ((6, 10), (10, 30), (20, 40), (50, 200), (200, 1000), (1000, 5000)):
+        yield f"random V={n} E={m} cap<=1000", random_network(n, m, 1000, rng)
+    for n, m in ((200, 1000), (1000, 5000), (100, 3000), (300, 20000), (3000, 30000)):
+        yield f"random V={n} E={m} unit", random_network(n, m, 1, rng)
+    for max_cap in (3, 10):
+        yield f"random V=1000 E=5000 cap<={max_cap}", random_network(1000, 5000, max_cap, rng)
+    for layers, width in ((5, 20), (20, 50)):
+        yield f"layered {layers}x{width} cap<=100", layered_network(layers, width, 100, rng)
+    for size in (100, 500):
+        yield f"matching {size}x{size}", matching_network(size, size, 4, rng)
+    for size in (20, 60):
+        yield f"segmentation grid {size}x{size}", segmentation_grid(size, rng)
+
+
+def timed(solve, cg, s, t, repeat):
+    best = float('Inf')
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        flow, res = solve(cg, s, t)
+        best = min(best, time.perf_counter() - begin)
+    return flow, best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time every max-flow engine on random networks")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    names = sorted(ENGINES)
+    print(f"{'network':36}" + ''.join(f"{name:>12}" for name in names) + f"{'auto':>8}")
+    for title, (cg, s, t) in families(random.Random(args.seed)):
+        results = [timed(ENGINES[name], cg, s, t, args.repeat) for name in names]
+        assert len({flow for flow, seconds in results}) == 1, f"engines disagree on {title}"
+        choice = choose_engine(graph_stats(cg, s, t))
+        print(f"{title:36}" + ''.join(f"{seconds * 1000:10.2f}ms" for flow, seconds in results) + f"{choice:>8}")
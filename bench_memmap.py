@@ -0,0 +1,92 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import compact
+from memmap_graph import build_memmap_graph, memmap_max_flow, memmap_dinic
+
+# Throughput of the memory-mapped solver against the same graph held in RAM.
+# The random networks are layered with shuffled node numbers, so without the
+# BFS renumbering neighbouring nodes end up far apart in the files. With
+# --cgroup the solves run inside that memory cgroup (Linux), so a graph whose
+# files are larger than its limit cannot stay in the page cache and is read
+# from disk; --skip-ram leaves out the in-RAM runs for such graphs.
+
+
+def layered_edges(layers, width, degree, max_cap, rng):
+    num_nodes = layers * width + 2
+    shuffle = rng.permutation(num_nodes)
+    rows = [np.column_stack((np.zeros(width, dtype=np.int64), 1 + np.arange(width),
+                             rng.integers(1, max_cap, width)))]
+    for layer in range(layers - 1):
+        tails = np.repeat(1 + layer * width + np.arange(width), degree)
+        heads = 1 + (layer + 1) * width + rng.integers(0, width, width * degree)
+        rows.append(np.column_stack((tails, heads, rng.integers(1, max_cap, width * degree))))
+    last = 1 + (layers - 1) * width + np.arange(width)
+    rows.append(np.column_stack((last, np.full(width, num_nodes - 1), rng.integers(1, max_cap, width))))
+
+    edges = np.concatenate(rows)
+    edges[:, :2] = shuffle[edges[:, :2]]
+    return edges, num_nodes, int(shuffle[0]), int(shuffle[num_nodes - 1])
+
+
+def timed(run):
+    begin = time.perf_counter()
+    result = run()
+    return result, time.perf_counter() - begin
+
+
+# Move this process into a memory cgroup; pages it touches from now on count
+# against that cgroup's limit
+def enter_cgroup(directory):
+    with open(os.path.join(directory, 'cgroup.procs'), 'w') as f:
+        f.write(str(os.getpid()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare memory-mapped and in-RAM max flow")
+    parser.add_argument('--layers', type=int, default=10)
+    parser.add_argument('--width', type=int, default=200)
+    parser.add_argument('--degree', type=int, default=3)
+    parser.add_argument('--chunk', type=int, default=1 << 20)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--skip-ram', action='store_true', help="only run the memory-mapped solver")
+    parser.add_argument('--cgroup', help="memory cgroup directory to solve in, e.g. /sys/fs/cgroup/memory/bench")
+    args = parser.parse_args()
+
+    edges, num_nodes, s, t = layered_edges(args.layers, args.width, args.degree, 100,
+                                           np.random.default_rng(args.seed))
+    print(f"V={num_nodes} E={len(edges)}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        if not args.skip_ram:
+            cg = compact.from_arrays(edges[:, 0], edges[:, 1], edges[:, 2], range(num_nodes))
+            (flow, res), seconds = timed(lambda: compact.dinic(cg, s, t))
+            print(f"{'in RAM, list-based Dinic':36}{seconds:9.2f}s  {len(edges) / seconds:12.0f} edges/s  flow={flow}")
+
+            res = cg.cap.copy()
+            flow, seconds = timed(lambda: memmap_dinic(cg, s, t, res, args.chunk))
+            print(f"{'in RAM, vectorized waves':36}{seconds:9.2f}s  {len(edges) / seconds:12.0f} edges/s  flow={flow}")
+            del cg, res
+
+        np.save(os.path.join(directory, 'edges.npy'), edges)
+        del edges
+        on_disk = np.load(os.path.join(directory, 'edges.npy'), mmap_mode='r')
+        builds = {}
+        for reorder in (False, True):
+            graph_dir = os.path.join(directory, f"graph_{reorder}")
+            _, builds[reorder] = timed(lambda: build_memmap_graph(on_disk, num_nodes, graph_dir, s, reorder,
+                                                                  args.chunk))
+        num_edges = len(on_disk)
+        del on_disk
+
+        if args.cgroup:
+            enter_cgroup(args.cgroup)
+        for reorder in (False, True):
+            graph_dir = os.path.join(directory, f"graph_{reorder}")
+            (flow, cut), seconds = timed(lambda: memmap_max_flow(graph_dir, s, t, args.chunk))
+            title = f"memmap, {'BFS order' if reorder else 'input order'} (build {builds[reorder]:.2f}s)"
+            print(f"{title:36}{seconds:9.2f}s  {num_edges / seconds:12.0f} edges/s  flow={flow}")
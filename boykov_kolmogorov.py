@@ -0,0 +1,196 @@
+from collections import deque
+
+import numpy as np
+
+import compact
+
+# Boykov-Kolmogorov max flow. A search tree grows from the source and another
+# from the sink; when they touch, the path through the touching arc is
+# augmented. Nodes cut off from their tree by saturated arcs become orphans and
+# look for a new parent in the same tree instead of the search starting over,
+# which is what makes it fast on grids with edges to both terminals.
+
+FREE, SOURCE, SINK = 0, 1, 2
+TERMINAL, ORPHAN, NONE = -2, -3, -1
+
+
+# parent[v] is the arc linking v to its tree: the arc into v in the source
+# tree, the arc out of v in the sink tree. Distances to the root, stamped with
+# the augmentation they were measured at, speed up the orphan checks.
+def boykov_kolmogorov(cg, s, t, res=None):
+    start, head, rev = cg.lists()
+    if res is None:
+        res = cg.cap.tolist()
+    flow = 0
+    if s == t:
+        return flow, res
+
+    n = cg.num_nodes
+    tree = [FREE] * n
+    parent = [NONE] * n
+    stamp = [0] * n
+    dist = [0] * n
+    tree[s], tree[t] = SOURCE, SINK
+    parent[s] = parent[t] = TERMINAL
+    dist[s] = dist[t] = 1
+    time = 0
+    scan = start[:n]  # Where the growth of each active node resumes
+    active = deque((s, t))
+    orphans = deque()
+
+    def parent_node(v):
+        return head[rev[parent[v]]] if tree[v] == SOURCE else head[parent[v]]
+
+    while True:
+        # Grow the trees until they touch
+        meet = None
+        while active:
+            p = active[0]
+            if tree[p] == FREE:
+                active.popleft()
+                continue
+            side = tree[p]
+            for a in range(scan[p], start[p + 1]):
+                if (res[a] if side == SOURCE else res[rev[a]]) == 0:
+                    continue
+                q = head[a]
+                if tree[q] == FREE:
+                    tree[q] = side
+                    parent[q] = a if side == SOURCE else rev[a]
+                    stamp[q] = stamp[p]
+                    dist[q] = dist[p] + 1
+                    scan[q] = start[q]
+                    active.append(q)
+                elif tree[q] != side:
+                    meet = a if side == SOURCE else rev[a]
+                    scan[p] = a
+                    break
+                elif stamp[q] <= stamp[p] and dist[q] > dist[p]:
+                    # q is closer to the root through p
+                    parent[q] = a if side == SOURCE else rev[a]
+                    stamp[q] = stamp[p]
+                    dist[q] = dist[p] + 1
+            if meet is not None:
+                break
+            active.popleft()
+
+        if meet is None:
+            break
+
+        # Augment along source root ... x -> y ... sink root
+        time += 1
+        x, y = head[rev[meet]], head[meet]
+        path_flow = res[meet]
+        v = x
+        while parent[v] != TERMINAL:
+            path_flow = min(path_flow, res[parent[v]])
+            v = head[rev[parent[v]]]
+        v = y
+        while parent[v] != TERMINAL:
+            path_flow = min(path_flow, res[parent[v]])
+            v = head[parent[v]]
+
+        res[meet] -= path_flow
+        res[rev[meet]] += path_flow
+        for v, step in ((x, lambda a: head[rev[a]]), (y, lambda a: head[a])):
+            while parent[v] != TERMINAL:
+                a = parent[v]
+                res[a] -= path_flow
+                res[rev[a]] += path_flow
+                next_v = step(a)
+                if res[a] == 0:
+                    parent[v] = ORPHAN
+                    orphans.append(v)
+                v = next_v
+        flow += path_flow
+
+        # Adopt the orphans or release them
+        while orphans:
+            v = orphans.popleft()
+            side = tree[v]
+            best, best_dist = NONE, float('Inf')
+            for a in range(start[v], start[v + 1]):
+                candidate = rev[a] if side == SOURCE else a
+                q = head[a]
+                if tree[q] != side or res[candidate] == 0 or parent[q] == NONE:
+                    continue
+                # Follow q up to its root unless it hangs off another orphan
+                d, k = 0, q
+                while True:
+                    if stamp[k] == time:
+                        d += dist[k]
+                        break
+                    d += 1
+                    if parent[k] == TERMINAL:
+                        stamp[k], dist[k] = time, 1
+                        break
+                    if parent[k] == ORPHAN:
+                        d = float('Inf')
+                        break
+                    k = parent_node(k)
+                if d == float('Inf'):
+                    continue
+                if d < best_dist:
+                    best, best_dist = candidate, d
+                k = q
+                while stamp[k] != time:
+                    stamp[k], dist[k] = time, d
+                    d -= 1
+                    k = parent_node(k)
+
+            if best != NONE:
+                parent[v] = best
+                stamp[v] = time
+                dist[v] = best_dist + 1
+                continue
+
+            for a in range(start[v], start[v + 1]):
+                q = head[a]
+                if tree[q] != side:
+                    continue
+                if (res[rev[a]] if side == SOURCE else res[a]) > 0:
+                    scan[q] = start[q]
+                    active.append(q)
+                if parent[q] not in (TERMINAL, ORPHAN, NONE) and parent_node(q) == v:
+                    parent[q] = ORPHAN
+                    orphans.append(q)
+            tree[v] = FREE
+            parent[v] = NONE
+
+    return flow, res
+
+
+# Grid network for segmentation-style problems, built straight from arrays.
+# Pixel (i, j) of an H x W grid is node i * W + j; the source and the sink are
+# nodes H * W and H * W + 1.
+#   right[i, j]  capacity from (i, j) to (i, j + 1), shape (H, W - 1)
+#   down[i, j]   capacity from (i, j) to (i + 1, j), shape (H - 1, W)
+#   left, up     the opposite directions, the same as right and down if omitted
+#   source_caps  capacity from the source to each pixel, shape (H, W)
+#   sink_caps    capacity from each pixel to the sink, shape (H, W)
+# Zero-capacity edges are left out.
+def grid_graph(right, down, source_caps, sink_caps, left=None, up=None):
+    height, width = np.shape(source_caps)
+    pixel = np.arange(height * width).reshape(height, width)
+    source, sink = height * width, height * width + 1
+    left = right if left is None else left
+    up = down if up is None else up
+
+    tails = [pixel[:, :-1], pixel[:, 1:], pixel[:-1, :], pixel[1:, :],
+             np.full((height, width), source), pixel]
+    heads = [pixel[:, 1:], pixel[:, :-1], pixel[1:, :], pixel[:-1, :],
+             pixel, np.full((height, width), sink)]
+    caps = [right, left, down, up, source_caps, sink_caps]
+
+    tails = np.concatenate([np.ravel(x) for x in tails])
+    heads = np.concatenate([np.ravel(x) for x in heads])
+    caps = np.concatenate([np.ravel(np.asarray(x, dtype=np.int64)) for x in caps])
+    keep = caps > 0
+
+    labels = [(i, j) for i in range(height) for j in range(width)] + ['source', 'sink']
+    return compact.from_arrays(tails[keep], heads[keep], caps[keep], labels), source, sink
+
+
+# Pixels on the source side of the minimum cut, as an H x W boolean array
+def grid_segmentation(cg, res, source, shape):
+    return compact.source_side(cg, res, source)[:shape[0] * shape[1]].reshape(shape)
@@ -0,0 +1,130 @@
+import numpy as np
+
+# Optimality certificate for a max-flow answer, checked without solving again.
+# A flow that respects every capacity, is conserved at every node other than
+# the source and sink, and whose value equals the capacity of some source-sink
+# cut is a maximum flow, and that cut is a minimum cut. All three checks are
+# array operations over the edges, O(V + E) in total.
+
+SHOWN = 5  # Offending edges or nodes listed per problem
+
+
+def listed(items):
+    items = list(items)
+    more = f" and {len(items) - SHOWN} more" if len(items) > SHOWN else ""
+    return ", ".join(repr(x) for x in items[:SHOWN]) + more
+
+
+# Nodes reachable from s over the edges where keep is set, as a boolean array.
+# Breadth-first one whole frontier at a time.
+def reachable(num_nodes, tails, heads, keep, s):
+    tails, heads = tails[keep], heads[keep]
+    order = np.argsort(tails, kind='stable')
+    heads = heads[order]
+    start = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(tails, minlength=num_nodes), out=start[1:])
+
+    side = np.zeros(num_nodes, dtype=bool)
+    side[s] = True
+    frontier = np.array([s])
+    while frontier.size:
+        counts = start[frontier + 1] - start[frontier]
+        first = np.repeat(start[frontier] - np.cumsum(counts) + counts, counts)
+        found = np.unique(heads[first + np.arange(counts.sum())])
+        frontier = found[~side[found]]
+        side[frontier] = True
+    return side
+
+
+# Checks a flow and a cut given as edge arrays: edge i runs from node tails[i]
+# to heads[i] with capacity caps[i] and carries flow[i]; side marks the source
+# side of the cut. Returns the problems found as readable strings, empty when
+# the flow is a maximum flow and the cut a minimum cut. names, if given, maps
+# node numbers to labels for the messages.
+def verify_arrays(num_nodes, tails, heads, caps, flow, s, t, side, value=None, names=None):
+    tails, heads = np.asarray(tails), np.asarray(heads)
+    caps, flow, side = np.asarray(caps), np.asarray(flow), np.asarray(side, dtype=bool)
+    names = names if names is not None else range(num_nodes)
+    problems = []
+
+    over = np.flatnonzero((flow < 0) | (flow > caps))
+    if over.size:
+        problems.append(f"flow outside [0, capacity] on {over.size} edge(s): "
+                        + listed((names[tails[i]], names[heads[i]]) for i in over))
+
+    net = np.zeros(num_nodes, dtype=np.result_type(flow, np.int64))
+    np.add.at(net, heads, flow)
+    np.subtract.at(net, tails, flow)
+    unbalanced = np.flatnonzero(net)
+    unbalanced = unbalanced[(unbalanced != s) & (unbalanced != t)]
+    if unbalanced.size:
+        problems.append(f"flow not conserved at {unbalanced.size} node(s): "
+                        + listed(names[v] for v in unbalanced))
+
+    flow_value = net[t]
+    if value is not None and value != flow_value:
+        problems.append(f"claimed flow value {value} but {flow_value} reaches the sink")
+
+    if not side[s] or side[t]:
+        problems.append("the cut does not separate the source from the sink")
+    else:
+        cut_capacity = caps[side[tails] & ~side[heads]].sum()
+        if cut_capacity != flow_value:
+            problems.append(f"flow value {flow_value} does not equal the cut capacity {cut_capacity}")
+    return problems
+
+
+# Checks the flows dict and min-cut edges returned for a networkx graph with
+# "capacity" on its edges. The source side is whatever the source still
+# reaches over the edges with capacity once the cut edges are removed.
+# Entries in flows for pairs that are not edges are only accepted as the
+# negated flow of the opposite edge, the skew-symmetric bookkeeping innov.py
+# keeps. Returns the list of problems.
+def verify_certificate(graph, source, sink, flows, min_cut_edges, flow_value=None):
+    names = list(graph.nodes)
+    index = {v: i for i, v in enumerate(names)}
+    edges = list(graph.edges(data='capacity'))
+    m = len(edges)
+    tails = np.fromiter((index[u] for u, v, cap in edges), dtype=np.int64, count=m)
+    heads = np.fromiter((index[v] for u, v, cap in edges), dtype=np.int64, count=m)
+    caps = np.array([cap for u, v, cap in edges])
+    flow = np.array([flows.get((u, v), 0) for u, v, cap in edges])
+    problems = []
+
+    strays = [(u, v) for (u, v), amount in flows.items()
+              if amount != 0 and not graph.has_edge(u, v) and flows.get((v, u)) != -amount]
+    if strays:
+        problems.append(f"flow on {len(strays)} pair(s) that are not edges: " + listed(strays))
+
+    cut = set(min_cut_edges)
+    keep = np.fromiter(((u, v) not in cut for u, v, cap in edges), dtype=bool, count=m)
+    side = reachable(len(names), tails, heads, keep & (caps > 0), index[source])
+
+    # Every listed edge has to leave the source side, or the list is not that cut
+    stray_cut = [(u, v) for u, v in cut
+                 if u not in index or v not in index or not side[index[u]] or side[index[v]]]
+    if stray_cut:
+        problems.append(f"{len(stray_cut)} listed cut edge(s) do not leave the source side: "
+                        + listed(stray_cut))
+    return problems + verify_arrays(len(names), tails, heads, caps, flow, index[source],
+                                    index[sink], side, flow_value, names)
+
+
+# Same for a solve on a CompactGraph, straight from its residual capacities.
+# The flow on an edge is what its forward arc lost, and must be what its
+# backward arc gained; the cut is where the source stops reaching in the
+# residual network.
+def verify_residual(cg, res, s, t, value=None):
+    res = np.asarray(res)
+    forward = np.flatnonzero(cg.forward)
+    flow = cg.cap[forward] - res[forward]
+    problems = []
+
+    unpaired = forward[res[cg.rev[forward]] != flow]
+    if unpaired.size:
+        problems.append(f"forward and backward residuals disagree on {unpaired.size} edge(s): "
+                        + listed((cg.labels[cg.tail[a]], cg.labels[cg.head[a]]) for a in unpaired))
+
+    side = reachable(cg.num_nodes, cg.tail, cg.head, res > 0, s)
+    return problems + verify_arrays(cg.num_nodes, cg.tail[forward], cg.head[forward], cg.cap[forward],
+                                    flow, s, t, side, value, cg.labels)
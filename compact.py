@@ -0,0 +1,390 @@
+import os
+import pickle
+
+import networkx as nx
+import numpy as np
+
+# Compact residual network in CSR form. Every input edge u->v becomes a forward
+# arc with its capacity and a paired backward arc v->u with capacity 0; rev[a]
+# is the index of the arc paired with a. Arcs are grouped by tail so the arcs
+# leaving node u are start[u]..start[u+1]-1.
+ARRAYS = ('start', 'tail', 'head', 'cap', 'rev', 'forward')
+
+
+class CompactGraph:
+    def __init__(self, labels, start, tail, head, cap, rev, forward):
+        self.labels = labels
+        self._index = None
+        self.start = start
+        self.tail = tail
+        self.head = head
+        self.cap = cap
+        self.rev = rev
+        self.forward = forward
+        self._lists = None
+
+    # Label to node index, built on first use
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = {label: i for i, label in enumerate(self.labels)}
+        return self._index
+
+    @property
+    def num_nodes(self):
+        return len(self.labels)
+
+    @property
+    def num_edges(self):
+        return len(self.cap) // 2
+
+    # Plain lists are much faster than numpy arrays for the per-arc loops of the solvers
+    def lists(self):
+        if self._lists is None:
+            self._lists = (self.start.tolist(), self.head.tolist(), self.rev.tolist())
+        return self._lists
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(directory, name + '.npy'), getattr(self, name))
+        with open(os.path.join(directory, 'labels.pickle'), 'wb') as f:
+            pickle.dump(self.labels, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+# Graphs too large for pickled labels keep them in labels.npy instead
+def load(directory, mmap_mode=None):
+    arrays = [np.load(os.path.join(directory, name + '.npy'), mmap_mode=mmap_mode) for name in ARRAYS]
+    if os.path.exists(os.path.join(directory, 'labels.npy')):
+        labels = np.load(os.path.join(directory, 'labels.npy'), mmap_mode=mmap_mode)
+    else:
+        with open(os.path.join(directory, 'labels.pickle'), 'rb') as f:
+            labels = pickle.load(f)
+    return CompactGraph(labels, *arrays)
+
+
+# Build from parallel arrays of node indices and capacities
+def from_arrays(tails, heads, caps, labels):
+    tails = np.asarray(tails, dtype=np.int64)
+    heads = np.asarray(heads, dtype=np.int64)
+    caps = np.asarray(caps, dtype=np.int64)
+    n, m = len(labels), len(caps)
+
+    arc_tail = np.concatenate((tails, heads))
+    arc_head = np.concatenate((heads, tails))
+    arc_cap = np.concatenate((caps, np.zeros(m, dtype=np.int64)))
+    forward = np.concatenate((np.ones(m, dtype=bool), np.zeros(m, dtype=bool)))
+
+    order = np.argsort(arc_tail, kind='stable')
+    position = np.empty(2 * m, dtype=np.int64)
+    position[order] = np.arange(2 * m)
+    pair = np.concatenate((np.arange(m, 2 * m), np.arange(m)))
+
+    start = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(arc_tail, minlength=n), out=start[1:])
+    return CompactGraph(list(labels), start, arc_tail[order], arc_head[order],
+                        arc_cap[order], position[pair[order]], forward[order])
+
+
+# Build from (u, v, capacity) triples, summing the capacities of repeated edges
+def from_edge_list(edge_list, nodes=()):
+    capacities = {}
+    labels = list(dict.fromkeys(nodes))
+    index = {label: i for i, label in enumerate(labels)}
+
+    for u, v, cap in edge_list:
+        for node in (u, v):
+            if node not in index:
+                index[node] = len(labels)
+                labels.append(node)
+        if u != v:
+            key = (index[u], index[v])
+            capacities[key] = capacities.get(key, 0) + int(cap)
+
+    tails = [u for u, v in capacities]
+    heads = [v for u, v in capacities]
+    return from_arrays(tails, heads, list(capacities.values()), labels)
+
+
+def from_networkx(graph):
+    return from_edge_list(graph.edges(data='capacity'), graph.nodes)
+
+
+# Build from a scipy.sparse adjacency matrix whose entry (u, v) is the capacity
+# of edge u -> v. labels names the rows, the row numbers by default. Repeated
+# entries are summed; self-loops and explicit zeros are left out. Capacities
+# must be finite whole numbers, though float matrices holding them are accepted.
+def from_sparse(matrix, labels=None):
+    if matrix.shape[0] != matrix.shape[1]:
+        raise ValueError(f"adjacency matrix must be square, got shape {matrix.shape}")
+    labels = list(range(matrix.shape[0]) if labels is None else labels)
+    if len(labels) != matrix.shape[0]:
+        raise ValueError(f"{len(labels)} labels for {matrix.shape[0]} nodes")
+
+    coo = matrix.tocoo(copy=True)
+    coo.sum_duplicates()
+    fractional = ~np.isfinite(coo.data) | (coo.data != np.round(coo.data))
+    if np.any(fractional):
+        u, v = coo.row[fractional][0], coo.col[fractional][0]
+        raise ValueError(f"capacities must be integers, got {coo.data[fractional][0]} on edge "
+                         f"{labels[u]!r} -> {labels[v]!r}")
+    keep = (coo.row != coo.col) & (coo.data > 0)
+    return from_arrays(coo.row[keep], coo.col[keep], coo.data[keep], labels)
+
+
+# Parse the "A-B-10, B-C-5" edge format used by the input dialogs
+def parse_edges(edges_input):
+    edge_list = []
+    for edge in edges_input.split(','):
+        u, v, cap = edge.split('-')
+        edge_list.append((u.strip(), v.strip(), int(cap)))
+    return edge_list
+
+
+# Arc used to reach each node on an augmenting path from s to t, or None.
+# Breadth-first gives the shortest path like the bfs in the scripts,
+# depth-first follows the stack order of their dfs.
+def find_path(cg, s, t, res, depth_first=False):
+    start, head, rev = cg.lists()
+    parent = [-1] * cg.num_nodes
+    parent[s] = -2
+    frontier = [s]
+    i = 0
+
+    while parent[t] == -1:
+        if depth_first:
+            if not frontier:
+                return None
+            u = frontier.pop()
+        else:
+            if i == len(frontier):
+                return None
+            u = frontier[i]
+            i += 1
+        for a in range(start[u], start[u + 1]):
+            v = head[a]
+            if parent[v] == -1 and res[a] > 0:
+                parent[v] = a
+                frontier.append(v)
+    return parent
+
+
+# Push the bottleneck capacity along the path recorded in parent
+def augment(cg, s, t, res, parent):
+    start, head, rev = cg.lists()
+    path_flow = float('Inf')
+    v = t
+    while v != s:
+        a = parent[v]
+        path_flow = min(path_flow, res[a])
+        v = head[rev[a]]
+
+    v = t
+    while v != s:
+        a = parent[v]
+        res[a] -= path_flow
+        res[rev[a]] += path_flow
+        v = head[rev[a]]
+    return path_flow
+
+
+# Augmenting-path max flow over arc indices. res holds the residual
+# capacities and can be passed in to continue from an earlier flow.
+def augmenting_paths(cg, s, t, res=None, depth_first=False):
+    if res is None:
+        res = cg.cap.tolist()
+    flow = 0
+    if s == t:
+        return flow, res
+
+    while True:
+        parent = find_path(cg, s, t, res, depth_first)
+        if parent is None:  # No augmenting path found
+            break
+        flow += augment(cg, s, t, res, parent)
+    return flow, res
+
+
+def edmonds_karp(cg, s, t, res=None):
+    return augmenting_paths(cg, s, t, res)
+
+
+def depth_first(cg, s, t, res=None):
+    return augmenting_paths(cg, s, t, res, depth_first=True)
+
+
+# BFS levels from s over arcs with residual capacity. layer_cut[d] is the
+# residual capacity from level d to level d+1: the nodes up to level d form a
+# cut, and since BFS arcs never skip a level this is all that crosses it.
+def residual_levels(cg, s, res):
+    start, head, rev = cg.lists()
+    level = [-1] * cg.num_nodes
+    level[s] = 0
+    layer_cut = [0]
+    queue = [s]
+    for u in queue:
+        next_level = level[u] + 1
+        for a in range(start[u], start[u + 1]):
+            if res[a] > 0:
+                v = head[a]
+                if level[v] < 0:
+                    level[v] = next_level
+                    queue.append(v)
+                    if next_level == len(layer_cut):
+                        layer_cut.append(0)
+                if level[v] == next_level:
+                    layer_cut[next_level - 1] += res[a]
+    return level, layer_cut
+
+
+# Augment along level-increasing paths until none is left, yielding the amount
+# of each augmentation once it has been applied to res. A current-arc pointer
+# per node means every arc is scanned once per phase.
+def blocking_flow(cg, s, t, res, level):
+    start, head, rev = cg.lists()
+    current = start[:cg.num_nodes]
+    path = []
+    u = s
+    while True:
+        if u == t:
+            path_flow = min(res[a] for a in path)
+            for a in path:
+                res[a] -= path_flow
+                res[rev[a]] += path_flow
+            yield path_flow
+            # Resume from the tail of the first arc the push saturated
+            k = next(i for i, a in enumerate(path) if res[a] == 0)
+            u = head[rev[path[k]]]
+            del path[k:]
+            continue
+
+        a, end, next_level = current[u], start[u + 1], level[u] + 1
+        while a < end and (res[a] == 0 or level[head[a]] != next_level):
+            a += 1
+        current[u] = a
+        if a < end:
+            path.append(a)
+            u = head[a]
+        elif path:
+            level[u] = -1  # Dead end for the rest of this phase
+            a = path.pop()
+            u = head[rev[a]]
+            current[u] = a + 1
+        else:
+            return
+
+
+# Dinic: BFS levels, then a blocking flow along level-increasing arcs
+def dinic(cg, s, t, res=None):
+    if res is None:
+        res = cg.cap.tolist()
+    flow = 0
+    if s == t:
+        return flow, res
+
+    while True:
+        level, layer_cut = residual_levels(cg, s, res)
+        if level[t] < 0:
+            break
+        flow += sum(blocking_flow(cg, s, t, res, level))
+    return flow, res
+
+
+# Nodes reachable from s in the residual network, as a boolean array
+def source_side(cg, res, s):
+    start, head, rev = cg.lists()
+    visited = [False] * cg.num_nodes
+    visited[s] = True
+    stack = [s]
+
+    while stack:
+        u = stack.pop()
+        for a in range(start[u], start[u + 1]):
+            v = head[a]
+            if not visited[v] and res[a] > 0:
+                visited[v] = True
+                stack.append(v)
+    return np.array(visited, dtype=bool)
+
+
+# Forward arcs leaving the source side: the saturated edges of the min cut
+def min_cut_arcs(cg, res, s):
+    side = source_side(cg, res, s)
+    return np.flatnonzero(cg.forward & side[cg.tail] & ~side[cg.head])
+
+
+# Min-cut edges as label pairs, in the same format as find_min_cut
+def min_cut(cg, res, s):
+    return [(cg.labels[cg.tail[a]], cg.labels[cg.head[a]]) for a in min_cut_arcs(cg, res, s)]
+
+
+# Flow on every arc; backward arcs carry the negated flow of their pair
+def arc_flows(cg, res):
+    return np.where(cg.forward, cg.cap - np.asarray(res), -(cg.cap[cg.rev] - np.asarray(res)[cg.rev]))
+
+
+# Flow on every input edge keyed by label pair, like the flows dict in innov.py
+def flow_dict(cg, res):
+    flows = arc_flows(cg, res)
+    return {(cg.labels[cg.tail[a]], cg.labels[cg.head[a]]): int(flows[a])
+            for a in np.flatnonzero(cg.forward)}
+
+
+# Residual graph in the networkx form returned by ford_fulkerson: every input
+# edge with its remaining capacity, plus the reverse edges flow was pushed along
+def to_residual_graph(cg, res):
+    residual_graph = nx.DiGraph()
+    residual_graph.add_nodes_from(cg.labels)
+    res = np.asarray(res)
+
+    for a in np.flatnonzero(cg.forward | (res > 0)):
+        u, v = cg.labels[cg.tail[a]], cg.labels[cg.head[a]]
+        if residual_graph.has_edge(u, v):
+            residual_graph[u][v]['capacity'] += int(res[a])
+        else:
+            residual_graph.add_edge(u, v, capacity=int(res[a]))
+    return residual_graph
+
+
+# Push up to limit units from a to b through the residual network, returns the amount moved
+def push_between(cg, a, b, res, limit):
+    moved = 0
+    while moved < limit:
+        parent = find_path(cg, a, b, res)
+        if parent is None:
+            break
+        start, head, rev = cg.lists()
+        amount = limit - moved
+        v = b
+        while v != a:
+            amount = min(amount, res[parent[v]])
+            v = head[rev[parent[v]]]
+        v = b
+        while v != a:
+            res[parent[v]] -= amount
+            res[rev[parent[v]]] += amount
+            v = head[rev[parent[v]]]
+        moved += amount
+    return moved
+
+
+# Lower the capacity of forward arc a to new_cap while keeping res a valid flow:
+# the flow above new_cap is routed back from the tail of a to s and from t to
+# the head of a, so the flow value drops by at most that much. Returns the
+# amount the flow value dropped.
+def reduce_capacity(cg, res, a, new_cap, s, t):
+    start, head, rev = cg.lists()
+    b = rev[a]
+    flow = res[b]
+    excess = max(0, flow - new_cap)
+    res[a] = max(0, new_cap - flow)
+    res[b] = flow - excess
+    if excess == 0:
+        return 0
+
+    u, v = head[b], head[a]
+    # The excess at u first tries to reach v around a, the rest goes back
+    excess -= push_between(cg, u, v, res, excess)
+    pushed_back = push_between(cg, u, s, res, excess)
+    push_between(cg, t, v, res, pushed_back)
+    return pushed_back
@@ -0,0 +1,96 @@
+import compact
+import engines
+
+# Split a flow into source->sink paths and cycles with the amount each carries.
+# Every path or cycle found empties at least one arc, so there are at most E of
+# them and each is found in O(V), O(V*E) overall. Results are streamed, only
+# the path currently being walked is held in memory.
+
+
+# Walk the arcs that still carry flow, yielding ('path', arcs, amount) for
+# walks from s that reach t and ('cycle', arcs, amount) for walks that close on
+# themselves. flow is indexed by arc and is used up as the walk goes.
+def decompose_arcs(cg, flow, s, t):
+    start, head, rev = cg.lists()
+    current = start[:cg.num_nodes]  # Next arc to look at, per node
+
+    def next_arc(u):
+        a, end = current[u], start[u + 1]
+        while a < end and flow[a] <= 0:
+            a += 1
+        current[u] = a
+        return a if a < end else None
+
+    def walk(root, stop):
+        arcs = []
+        position = {root: 0}  # Where each node on the walk appears in arcs
+        u = root
+        while True:
+            if u == stop and arcs:
+                kind, found = 'path', arcs
+            else:
+                a = next_arc(u)
+                if a is None and not arcs:  # A cycle through root used up its flow
+                    return
+                if a is None:
+                    raise ValueError(f"flow is not conserved at node {cg.labels[u]!r}")
+                v = head[a]
+                arcs.append(a)
+                if v not in position:
+                    position[v] = len(arcs)
+                    u = v
+                    continue
+                kind, found = 'cycle', arcs[position[v]:]
+
+            amount = min(flow[a] for a in found)
+            for a in found:
+                flow[a] -= amount
+            yield kind, list(found), amount
+
+            if kind == 'path':
+                return
+            # Keep the part of the walk before the cycle and carry on from there
+            for a in found:
+                del position[head[a]]
+            del arcs[len(arcs) - len(found):]
+            position[v] = len(arcs)
+            u = v
+
+    while next_arc(s) is not None:
+        yield from walk(s, t)
+
+    # Whatever is left is circulation
+    for u in range(cg.num_nodes):
+        while next_arc(u) is not None:
+            yield from walk(u, None)
+
+
+# Decompose the flow left behind by an engine, given its residual capacities.
+# Yields (kind, nodes, amount) with nodes as labels, from source to sink for a
+# path and starting and ending at the same node for a cycle.
+def decompose_flow(cg, res, s, t):
+    flow = compact.arc_flows(cg, res).clip(min=0).tolist()
+    start, head, rev = cg.lists()
+    for kind, arcs, amount in decompose_arcs(cg, flow, s, t):
+        nodes = [cg.labels[head[rev[arcs[0]]]]] + [cg.labels[head[a]] for a in arcs]
+        yield kind, nodes, amount
+
+
+# Solve the network and stream the decomposition of its maximum flow
+def flow_paths(graph, source, sink, engine='auto'):
+    cg = compact.from_networkx(graph)
+    s, t = cg.index[source], cg.index[sink]
+    flow, res = engines.solve(cg, s, t, engine)
+    yield from decompose_flow(cg, res, s, t)
+
+
+# Decompose the flows of a graph given as a dict, like the one innov.py keeps
+def decompose_flow_dict(graph, flows, source, sink):
+    cg = compact.from_networkx(graph)
+    res = cg.cap.copy()
+    for a in range(len(res)):
+        if cg.forward[a]:
+            amount = flows.get((cg.labels[cg.tail[a]], cg.labels[cg.head[a]]), 0)
+            res[a] -= amount
+            res[cg.rev[a]] += amount
+    yield from decompose_flow(cg, res, cg.index[source], cg.index[sink])
@@ -0,0 +1,145 @@
+import argparse
+
+import numpy as np
+
+import compact
+from boykov_kolmogorov import boykov_kolmogorov
+
+# Max-flow engines by name. Each one takes a compact graph, source and sink
+# indices and optionally residual capacities to continue from, and returns
+# (flow, residual capacities).
+ENGINES = {}
+
+
+def register_engine(name, solve):
+    ENGINES[name] = solve
+
+
+register_engine('bfs', compact.edmonds_karp)
+register_engine('dfs', compact.depth_first)
+register_engine('dinic', compact.dinic)
+register_engine('bk', boykov_kolmogorov)
+
+# scipy's compiled solver, when scipy is installed
+try:
+    from sparse_flow import csgraph_max_flow
+except ImportError:
+    csgraph_max_flow = None
+if csgraph_max_flow is not None:
+    register_engine('scipy', csgraph_max_flow)
+
+
+# Two-colour the undirected graph left after removing s and t
+def is_bipartite(cg, s, t):
+    start, head, rev = cg.lists()
+    color = [-1] * cg.num_nodes
+    color[s] = color[t] = 2
+
+    for root in range(cg.num_nodes):
+        if color[root] != -1:
+            continue
+        color[root] = 0
+        stack = [root]
+        while stack:
+            u = stack.pop()
+            for a in range(start[u], start[u + 1]):
+                v = head[a]
+                if color[v] == -1:
+                    color[v] = 1 - color[u]
+                    stack.append(v)
+                elif color[v] == color[u]:
+                    return False
+    return True
+
+
+# Cheap statistics the automatic engine choice is based on, all O(V + E)
+def graph_stats(cg, s, t):
+    n, m = cg.num_nodes, cg.num_edges
+    out_of_source = cg.cap[cg.start[s]:cg.start[s + 1]].sum()
+    into_sink = cg.cap[cg.rev[cg.start[t]:cg.start[t + 1]]].sum()
+    linked = np.zeros(n, dtype=np.int8)
+    linked[cg.head[cg.start[s]:cg.start[s + 1]]] += 1
+    linked[cg.head[cg.start[t]:cg.start[t + 1]]] += 1
+    return {
+        'nodes': n,
+        'edges': m,
+        'density': m / (n * (n - 1)) if n > 1 else 0.0,
+        'bipartite': is_bipartite(cg, s, t),
+        'flow_bound': int(min(out_of_source, into_sink)),
+        'terminal_fraction': float(np.count_nonzero(linked == 2)) / max(n - 2, 1),
+    }
+
+
+# Engine expected to be fastest, from the timings printed by bench_engines.py.
+# Every augmentation carries at least one unit, so plain dfs makes at most
+# flow_bound scans of the edges. While that product is small it beats building
+# search structures (1.0ms against bk's 3.7ms at V=1000 E=5000 with unit
+# capacities), but capacities up to 3 on the same network already lift it past
+# the cut-off and dfs falls behind (6.5ms against 2.7ms). On tiny inputs bfs
+# wins, and it degrades with the size, so it is not picked beyond that.
+# Boykov-Kolmogorov's reused search trees win on segmentation grids (most nodes
+# linked to both terminals) and on sparse random networks. Dinic's level graphs
+# win on layered and bipartite (matching-style) networks. scipy's compiled
+# solver, when installed, wins past about 500 edges on grids (10.8ms against
+# bk's 118ms at 60x60), on layered and matching networks (3.0ms against
+# dinic's 12.5ms on 20x50 layers) and on dense ones (8.7ms against bk's 17.8ms
+# at V=300 E=20000), but not on sparse random networks, where bk stays ahead
+# (2.0ms against 4.7ms at V=1000 E=5000).
+def choose_engine(stats):
+    if stats['flow_bound'] * stats['edges'] <= 30000:
+        return 'dfs'
+    if stats['edges'] <= 40:
+        return 'bfs'
+    if 'scipy' in ENGINES and stats['edges'] > 500 and (
+            stats['terminal_fraction'] >= 0.5 or stats['bipartite'] or stats['density'] >= 0.1):
+        return 'scipy'
+    if stats['terminal_fraction'] >= 0.5:
+        return 'bk'
+    if stats['bipartite']:
+        return 'dinic'
+    return 'bk'
+
+
+# Solve on a compact graph with the named engine or "auto"
+def solve(cg, s, t, engine='auto', res=None):
+    if engine == 'auto':
+        engine = choose_engine(graph_stats(cg, s, t))
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine {engine!r}, expected 'auto' or one of {sorted(ENGINES)}")
+    return ENGINES[engine](cg, s, t, res)
+
+
+# Entry point with the same result as ford_fulkerson in the scripts:
+# (maximum flow, residual graph as a networkx DiGraph)
+def max_flow(graph, source, sink, engine='auto'):
+    cg = compact.from_networkx(graph)
+    flow, res = solve(cg, cg.index[source], cg.index[sink], engine)
+    return flow, compact.to_residual_graph(cg, res)
+
+
+# Same for a scipy.sparse adjacency matrix, with source and sink given as
+# labels (row numbers by default). Returns (maximum flow, flows dict, residual
+# graph, min-cut edges in the find_min_cut format).
+def max_flow_sparse(matrix, source, sink, labels=None, engine='auto'):
+    cg = compact.from_sparse(matrix, labels)
+    s = cg.index[source]
+    flow, res = solve(cg, s, cg.index[sink], engine)
+    return flow, compact.flow_dict(cg, res), compact.to_residual_graph(cg, res), compact.min_cut(cg, res, s)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute the maximum flow of a network")
+    parser.add_argument('edges', help="edges with capacities, e.g. \"A-B-10, B-C-5, C-D-10\"")
+    parser.add_argument('source')
+    parser.add_argument('sink')
+    parser.add_argument('--engine', default='auto', help="auto or one of the registered engines")
+    args = parser.parse_args()
+
+    cg = compact.from_edge_list(compact.parse_edges(args.edges))
+    s, t = cg.index[args.source.strip()], cg.index[args.sink.strip()]
+    engine = choose_engine(graph_stats(cg, s, t)) if args.engine == 'auto' else args.engine
+    flow, res = solve(cg, s, t, engine)
+
+    print(f"Engine: {engine}")
+    print(f"Maximum Flow: {flow}")
+    print(f"Min Cut: {compact.min_cut(cg, res, s)}")
@@ -0,0 +1,240 @@
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import compact
+import engines
+
+# Line-based JSON protocol, one request per line and one reply per line:
+#   {"op": "load", "graph": "net", "edges": "A-B-10, B-C-5", "nodes": ["A", "B", "C"]}
+#   {"op": "load", "graph": "net", "edges": [["A", "B", 10], ["B", "C", 5]]}
+#   {"op": "load", "graph": "net", "path": "/data/net.txt"}
+#   {"op": "max_flow", "graph": "net", "source": "A", "sink": "C", "engine": "auto"}
+#   {"op": "batch", "queries": [{"op": "max_flow", ...}, ...]}
+#   {"op": "unload", "graph": "net"}
+#   {"op": "graphs"}
+# Replies carry "ok": true and the result fields, or "ok": false and "error".
+# A load by path reads the edge file on the server, one "u v capacity" edge per
+# line with the labels kept as strings, so large graphs need not travel as one
+# JSON line. Lines longer than the line limit get an error reply and the
+# connection is closed.
+
+LINE_LIMIT = 64 * 2**20
+
+worker_graphs = OrderedDict()  # Graphs a worker process has already opened
+WORKER_GRAPH_LIMIT = 8
+
+
+def worker_graph(directory):
+    if directory in worker_graphs:
+        worker_graphs.move_to_end(directory)
+        return worker_graphs[directory]
+
+    cg = compact.load(directory, mmap_mode='r')
+    worker_graphs[directory] = cg
+    while len(worker_graphs) > WORKER_GRAPH_LIMIT:
+        worker_graphs.popitem(last=False)
+    return cg
+
+
+# Runs in a worker process: open the spilled graph once, then solve on it
+def solve_in_worker(directory, s, t, engine):
+    cg = worker_graph(directory)
+    flow, res = engines.solve(cg, s, t, engine)
+    return flow, compact.min_cut_arcs(cg, res, s).tolist()
+
+
+# Edges of a whitespace-separated "u v capacity" file, skipping blank lines
+# and lines starting with #
+def read_edge_file(path):
+    edge_list = []
+    with open(path) as f:
+        for line in f:
+            fields = line.split()
+            if fields and not fields[0].startswith('#'):
+                u, v, cap = fields
+                edge_list.append((u, v, int(cap)))
+    return edge_list
+
+
+# Runs in a thread: read or parse the edges, build the graph and spill its arrays
+def build_and_spill(edges, nodes, directory, path=None):
+    if path is not None:
+        edge_list = read_edge_file(path)
+    elif isinstance(edges, str):
+        edge_list = compact.parse_edges(edges)
+    else:
+        edge_list = edges
+    cg = compact.from_edge_list(edge_list, nodes)
+    cg.save(directory)
+    return cg
+
+
+class MaxFlowServer:
+    def __init__(self, workers=None, result_items=4096):
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.spill_dir = tempfile.mkdtemp(prefix='max_flow_server_')
+        self.graphs = {}  # name -> (version, compact graph, spill directory)
+        self.version = 0
+        self.inflight = {}
+        self.running = {}  # version -> queries on it still in the process pool
+        self.retired = {}  # version -> spill directory to remove once its queries finish
+        self.results = OrderedDict()
+        self.result_items = result_items
+
+    # Keep the graph resident in the server and spill its arrays to disk, so
+    # workers memory-map them instead of receiving a pickled graph per query.
+    # Building runs off the event loop so a large load does not stall other clients.
+    async def load(self, name, edges=None, nodes=(), path=None):
+        if (edges is None) == (path is None):
+            raise ValueError("load needs exactly one of edges and path")
+        self.version += 1
+        version = self.version
+        directory = os.path.join(self.spill_dir, str(version))
+        loop = asyncio.get_running_loop()
+        cg = await loop.run_in_executor(None, build_and_spill, edges, nodes, directory, path)
+
+        # A later load of the same name may have finished first
+        if name in self.graphs and self.graphs[name][0] > version:
+            self.remove(version, directory)
+        else:
+            self.unload(name)
+            self.graphs[name] = (version, cg, directory)
+        return {'nodes': cg.num_nodes, 'edges': cg.num_edges}
+
+    def unload(self, name):
+        if name in self.graphs:
+            version, cg, directory = self.graphs.pop(name)
+            self.remove(version, directory)
+            return True
+        return False
+
+    # Workers may still be reading the files of queued queries, so wait for them
+    def remove(self, version, directory):
+        if self.running.get(version):
+            self.retired[version] = directory
+        else:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def finished(self, key):
+        self.inflight.pop(key, None)
+        version = key[0]
+        self.running[version] -= 1
+        if not self.running[version]:
+            del self.running[version]
+            if version in self.retired:
+                shutil.rmtree(self.retired.pop(version), ignore_errors=True)
+
+    async def max_flow(self, name, source, sink, engine='auto'):
+        version, cg, directory = self.graphs[name]
+        s, t = cg.index[source], cg.index[sink]
+        if engine != 'auto' and engine not in engines.ENGINES:
+            raise ValueError(f"unknown engine: {engine}")
+
+        key = (version, s, t, engine)
+        if key in self.results:
+            self.results.move_to_end(key)
+            return self.results[key]
+
+        # Identical queries already being solved share the same future
+        if key not in self.inflight:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.executor, solve_in_worker, directory, s, t, engine)
+            self.inflight[key] = future
+            self.running[version] = self.running.get(version, 0) + 1
+            future.add_done_callback(lambda f: self.finished(key))
+        flow, cut_arcs = await asyncio.shield(self.inflight[key])
+
+        result = {
+            'max_flow': flow,
+            'min_cut': [[cg.labels[cg.tail[a]], cg.labels[cg.head[a]]] for a in cut_arcs],
+        }
+        self.results[key] = result
+        while len(self.results) > self.result_items:
+            self.results.popitem(last=False)
+        return result
+
+    async def handle(self, request):
+        if not isinstance(request, dict):
+            return {'ok': False, 'error': "request must be a JSON object"}
+        try:
+            op = request.get('op')
+            if op == 'load':
+                reply = await self.load(request['graph'], request.get('edges'), request.get('nodes', ()),
+                                        request.get('path'))
+            elif op == 'max_flow':
+                reply = await self.max_flow(request['graph'], request['source'], request['sink'],
+                                            request.get('engine', 'auto'))
+            elif op == 'batch':
+                replies = await asyncio.gather(*(self.handle(query) for query in request['queries']))
+                reply = {'results': replies}
+            elif op == 'unload':
+                reply = {'unloaded': self.unload(request['graph'])}
+            elif op == 'graphs':
+                reply = {'graphs': sorted(self.graphs)}
+            else:
+                raise ValueError(f"unknown op: {op}")
+        except KeyError as e:
+            return {'ok': False, 'error': f"unknown graph or node: {e}"}
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+        return {'ok': True, **reply}
+
+    async def client_connected(self, reader, writer):
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError) as e:
+                    # The rest of the line may be unread, so give up on the stream
+                    reply = {'ok': False, 'error': f"request line too long: {e}"}
+                    writer.write(json.dumps(reply).encode() + b'\n')
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError as e:
+                    reply = {'ok': False, 'error': f"invalid JSON: {e}"}
+                else:
+                    reply = await self.handle(request)
+                writer.write(json.dumps(reply).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+
+async def serve(host='127.0.0.1', port=8765, unix_path=None, workers=None, line_limit=LINE_LIMIT):
+    server = MaxFlowServer(workers)
+    try:
+        if unix_path:
+            listener = await asyncio.start_unix_server(server.client_connected, unix_path, limit=line_limit)
+        else:
+            listener = await asyncio.start_server(server.client_connected, host, port, limit=line_limit)
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve max-flow and min-cut queries over JSON lines")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help="listen on this Unix socket path instead of TCP")
+    parser.add_argument('--workers', type=int, help="number of solver processes")
+    parser.add_argument('--line-limit', type=int, default=LINE_LIMIT, help="longest request line in bytes")
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.unix, args.workers, args.line_limit))
@@ -0,0 +1,121 @@
+import threading
+import tkinter as tk
+from collections import OrderedDict
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+# Pre-rendered frames for the step viewer. Steps are drawn off-screen with Agg
+# in a background thread and kept as PPM bitmaps, so showing a step is just
+# handing a bitmap to Tk instead of laying out and drawing the whole graph.
+
+
+# Draw into a fresh off-screen figure and return the picture as binary PPM.
+# Only Figure and Agg are used here, never pyplot, so it is safe off the Tk thread.
+def render_frame(draw, figsize=(8, 6), dpi=100):
+    figure = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(figure)
+    draw(figure.add_subplot())
+    figure.canvas.draw()
+
+    rgba = np.asarray(figure.canvas.buffer_rgba())
+    height, width = rgba.shape[:2]
+    return b'P6 %d %d 255\n' % (width, height) + rgba[:, :, :3].tobytes()
+
+
+# Tk image for a frame, must be called on the Tk thread
+def frame_image(frame):
+    return tk.PhotoImage(data=frame, format='PPM')
+
+
+# Frames by key, least recently used dropped first once they add up to max_bytes
+class FrameCache:
+    def __init__(self, max_bytes=64 * 2**20):
+        self.max_bytes = max_bytes
+        self.frames = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.frames
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.frames:
+                return None
+            self.frames.move_to_end(key)
+            return self.frames[key]
+
+    def put(self, key, frame):
+        with self.lock:
+            if key in self.frames:
+                self.total_bytes -= len(self.frames.pop(key))
+            self.frames[key] = frame
+            self.total_bytes += len(frame)
+            while self.total_bytes > self.max_bytes and len(self.frames) > 1:
+                old_key, old_frame = self.frames.popitem(last=False)
+                self.total_bytes -= len(old_frame)
+
+
+# Renders the frames around the step being viewed in a background thread,
+# nearest first: up to ahead steps forward and behind steps back, but never
+# more frames than the cache can hold, or each render would evict another
+# frame of the window and the thread would never rest.
+# render(index) returns the frame for a step.
+class FramePrefetcher:
+    def __init__(self, render, count, cache=None, ahead=5, behind=2):
+        self.render = render
+        self.count = count
+        self.cache = cache if cache is not None else FrameCache()
+        self.ahead = ahead
+        self.behind = behind
+        self.current = 0
+        self.frame_bytes = 0  # Size of the last frame rendered
+        self.closed = False
+        self.wakeup = threading.Condition()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    # Frame for a step, rendered right away if the background thread has not got to it yet
+    def frame(self, index):
+        frame = self.cache.get(index)
+        if frame is None:
+            frame = self.render(index)
+            self.frame_bytes = len(frame)
+            self.cache.put(index, frame)
+        return frame
+
+    def focus(self, index):
+        with self.wakeup:
+            self.current = index
+            self.wakeup.notify()
+
+    def next_missing(self):
+        wanted = range(max(0, self.current - self.behind), min(self.count, self.current + self.ahead + 1))
+        wanted = sorted(wanted, key=lambda i: (abs(i - self.current), i < self.current))
+        if self.frame_bytes:
+            wanted = wanted[:max(1, self.cache.max_bytes // self.frame_bytes)]
+        for index in wanted:
+            if index not in self.cache:
+                return index
+        return None
+
+    def run(self):
+        while True:
+            with self.wakeup:
+                index = self.next_missing()
+                while index is None and not self.closed:
+                    self.wakeup.wait()
+                    index = self.next_missing()
+                if self.closed:
+                    return
+            frame = self.render(index)
+            self.frame_bytes = len(frame)
+            self.cache.put(index, frame)
+
+    def close(self):
+        with self.wakeup:
+            self.closed = True
+            self.wakeup.notify()
@@ -0,0 +1,292 @@
+import heapq
+from collections import deque
+
+import numpy as np
+
+import compact
+
+# Global minimum cut: the cheapest set of edges whose removal disconnects the
+# graph, without fixing a source and sink. Instead of one max flow per node,
+# undirected graphs use Stoer-Wagner (repeated maximum adjacency orderings) and
+# directed graphs use Hao-Orlin, a single push-relabel run in which every node
+# in turn becomes the sink and then joins the source set, so the preflow is
+# reused from one sink to the next.
+
+
+# Returns (cut value, source side as a boolean array). Each phase orders the
+# nodes by how strongly they are tied to the ones already taken; the last node
+# is cut off at the value of its tie, then merged into the one before it.
+def stoer_wagner(cg):
+    n = cg.num_nodes
+    if n < 2:
+        raise ValueError("graph has less than two nodes")
+
+    weights = [{} for _ in range(n)]
+    for a in np.flatnonzero(cg.forward & (cg.cap > 0)).tolist():
+        u, v, cap = int(cg.tail[a]), int(cg.head[a]), int(cg.cap[a])
+        weights[u][v] = weights[u].get(v, 0) + cap
+        weights[v][u] = weights[v].get(u, 0) + cap
+    members = [[v] for v in range(n)]
+    alive = list(range(n))
+
+    best, best_side = float('Inf'), None
+    while len(alive) > 1:
+        tie = {}
+        taken = set()
+        order = []
+        heap = []
+        unseen = iter(alive)
+        while len(order) < len(alive):
+            if not heap:  # Next component
+                v = next(v for v in unseen if v not in taken)
+                heap.append((0, v))
+                tie[v] = 0
+            key, v = heapq.heappop(heap)
+            if v in taken or -key != tie[v]:
+                continue
+            taken.add(v)
+            order.append(v)
+            for w, cap in weights[v].items():
+                if w not in taken:
+                    tie[w] = tie.get(w, 0) + cap
+                    heapq.heappush(heap, (-tie[w], w))
+
+        u, v = order[-2], order[-1]
+        if tie[v] < best:
+            best, best_side = tie[v], list(members[v])
+
+        # Merge v into u
+        members[u].extend(members[v])
+        for w, cap in weights[v].items():
+            del weights[w][v]
+            if w != u:
+                weights[u][w] = weights[u].get(w, 0) + cap
+                weights[w][u] = weights[w].get(u, 0) + cap
+        weights[v] = {}
+        alive.remove(v)
+
+    side = np.zeros(n, dtype=bool)
+    side[best_side] = True
+    return best, side
+
+
+# Minimum over the directed cuts with s on the source side. Returns (cut value,
+# source side as a boolean array). The nodes still in play are the awake ones;
+# when push-relabel would open a gap in their heights, or a node has no residual
+# arc left into them, the nodes cut off become a dormant set and are woken
+# again, last in first out, once every awake node has joined the source set.
+# Active nodes are discharged highest first, and after about m + 6n units of
+# relabelling work the awake heights are reset to exact distances to the sink.
+def hao_orlin(cg, s):
+    n = cg.num_nodes
+    if n < 2:
+        raise ValueError("graph has less than two nodes")
+    start, head, rev = cg.lists()
+    res = cg.cap.tolist()
+    excess = [0] * n
+    height = [0] * n
+    in_source = [False] * n
+    awake = [True] * n
+    awake_nodes = set(range(n))
+    dormant = []
+    count = {0: n}  # Awake nodes at each height
+    current = start[:n]
+    buckets = {}  # Active awake nodes by height
+    queued = [False] * n
+    relabel_limit = len(head) + 6 * n
+    t = top = -1
+    work = 0
+    # Arcs into the awake nodes are saturated and none leaving them carry flow,
+    # so the cut around them is worth the excess they hold
+    awake_excess = 0
+
+    def activate(v):
+        nonlocal top
+        if not queued[v] and awake[v] and excess[v] > 0 and v != t:
+            queued[v] = True
+            buckets.setdefault(height[v], []).append(v)
+            top = max(top, height[v])
+
+    def leave(v):
+        nonlocal awake_excess
+        awake[v] = False
+        awake_nodes.discard(v)
+        count[height[v]] -= 1
+        awake_excess -= excess[v]
+
+    def sleep(group):
+        dormant.append(group)
+        for v in group:
+            leave(v)
+
+    def wake(group):
+        nonlocal awake_excess
+        for v in group:
+            awake[v] = True
+            awake_nodes.add(v)
+            count[height[v]] = count.get(height[v], 0) + 1
+            awake_excess += excess[v]
+            current[v] = start[v]
+
+    def join_source(v):
+        nonlocal awake_excess
+        leave(v)
+        in_source[v] = True
+        height[v] = n
+        for a in range(start[v], start[v + 1]):
+            w = head[a]
+            if res[a] > 0 and not in_source[w]:
+                if awake[w]:
+                    awake_excess += res[a]
+                excess[w] += res[a]
+                excess[v] -= res[a]
+                res[rev[a]] += res[a]
+                res[a] = 0
+                activate(w)
+
+    # Exact distances to the sink over the awake nodes; the ones that cannot
+    # reach it any more go dormant together
+    def global_relabel():
+        nonlocal top
+        distance = {t: height[t]}
+        queue = deque((t,))
+        while queue:
+            w = queue.popleft()
+            for a in range(start[w], start[w + 1]):
+                v = head[a]
+                if res[rev[a]] > 0 and awake[v] and v not in distance:
+                    distance[v] = distance[w] + 1
+                    queue.append(v)
+        cut_off = [v for v in awake_nodes if v not in distance]
+        if cut_off:
+            sleep(cut_off)
+            for v in cut_off:
+                queued[v] = False
+
+        for v, d in distance.items():
+            count[height[v]] -= 1
+            height[v] = d
+            count[d] = count.get(d, 0) + 1
+            current[v] = start[v]
+            queued[v] = False
+        buckets.clear()
+        top = -1
+        for v in distance:
+            activate(v)
+
+    def discharge(v):
+        nonlocal work
+        while excess[v] > 0:
+            if current[v] == start[v + 1]:
+                h = height[v]
+                if count[h] == 1:
+                    sleep([w for w in awake_nodes if height[w] >= h])
+                    return
+                work += start[v + 1] - start[v] + 12
+                reachable = [height[head[a]] for a in range(start[v], start[v + 1])
+                             if res[a] > 0 and awake[head[a]]]
+                if not reachable:
+                    sleep([v])
+                    return
+                count[h] -= 1
+                height[v] = min(reachable) + 1
+                count[height[v]] = count.get(height[v], 0) + 1
+                current[v] = start[v]
+                continue
+
+            a = current[v]
+            w = head[a]
+            if res[a] > 0 and awake[w] and height[v] == height[w] + 1:
+                delta = min(excess[v], res[a])
+                res[a] -= delta
+                res[rev[a]] += delta
+                excess[v] -= delta
+                excess[w] += delta
+                activate(w)
+            else:
+                current[v] += 1
+
+    best, best_side = float('Inf'), None
+    join_source(s)
+    while True:
+        if not awake_nodes:
+            if not dormant:
+                break
+            group = dormant.pop()
+            wake(group)
+            for v in group:
+                activate(v)
+
+        # Push everything the awake nodes can pass on to the sink
+        t = min(awake_nodes, key=lambda v: height[v])
+        while top >= 0:
+            if work > relabel_limit:
+                work = 0
+                global_relabel()
+                continue
+            bucket = buckets.get(top)
+            if not bucket:
+                top -= 1
+                continue
+            v = bucket.pop()
+            queued[v] = False
+            if height[v] != top:
+                activate(v)
+            elif awake[v] and v != t:
+                discharge(v)
+
+        if awake_excess < best:
+            best, best_side = awake_excess, ~np.array(awake)
+        if best == 0:  # Nothing cheaper left to find
+            break
+        join_source(t)
+
+    return best, best_side
+
+
+# Cut edges leaving the source side, as (u, v) label pairs like find_min_cut.
+# Undirected edges are listed once, from the source side.
+def cut_edges(cg, side, directed=True):
+    crossing = cg.forward & (side[cg.tail] != side[cg.head])
+    if directed:
+        crossing &= side[cg.tail]
+    edges = []
+    for a in np.flatnonzero(crossing).tolist():
+        u, v = cg.labels[cg.tail[a]], cg.labels[cg.head[a]]
+        edges.append((u, v) if side[cg.tail[a]] else (v, u))
+    return edges
+
+
+# Directed cuts with s on either side: the cuts with s on the sink side are
+# found by running Hao-Orlin again with every edge reversed
+def directed_min_cut(cg):
+    best, side = hao_orlin(cg, 0)
+    if best == 0:
+        return best, side
+    forward = cg.forward
+    reverse = compact.from_arrays(cg.head[forward], cg.tail[forward], cg.cap[forward], cg.labels)
+    value, reverse_side = hao_orlin(reverse, 0)
+    if value < best:
+        best, side = value, ~reverse_side
+    return best, side
+
+
+# Global minimum cut of a networkx graph with "capacity" on its edges.
+# Returns (cut value, cut edges in the find_min_cut format).
+def global_min_cut(graph):
+    cg = compact.from_networkx(graph)
+    if graph.is_directed():
+        value, side = directed_min_cut(cg)
+    else:
+        value, side = stoer_wagner(cg)
+    return value, cut_edges(cg, side, graph.is_directed())
+
+
+# Edge connectivity: the fewest edges whose removal disconnects the graph
+def edge_connectivity(graph):
+    cg = compact.from_edge_list(((u, v, 1) for u, v in graph.edges), graph.nodes)
+    if graph.is_directed():
+        value, side = directed_min_cut(cg)
+    else:
+        value, side = stoer_wagner(cg)
+    return value, cut_edges(cg, side, graph.is_directed())
@@ -2,11 +2,12 @@ import tkinter as tk
 from tkinter import simpledialog
 import networkx as nx
 import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from frame_cache import FramePrefetcher, render_frame, frame_image
 
 snapshots = []  # Store graphs for each step
 current_step = 0  # Track the current step being displayed
 layout_pos = None  # Global variable for layout positions
+prefetcher = None  # Renders upcoming steps in the background
 
 def ford_fulkerson(graph, source, sink):
     flow = 0
@@ -74,32 +75,50 @@ def bfs(graph, source, sink):
                 parent[v] = u
     return None
 
-def plot_graph(graph, path_edges=None, step=0):
-    plt.clf()
-    global layout_pos  # Use the same layout for all steps
-
-    nx.draw(graph, layout_pos, with_labels=True, node_size=3000, node_color='lightblue', font_size=12, font_weight='bold')
+# Draw one step on the given axes. Only the ax-based networkx functions are
+# used so steps can also be drawn off-screen by the frame prefetcher.
+def draw_step(ax, graph, path_edges=None, step=0):
+    nx.draw_networkx_nodes(graph, layout_pos, ax=ax, node_size=3000, node_color='lightblue')
+    nx.draw_networkx_labels(graph, layout_pos, ax=ax, font_size=12, font_weight='bold')
+    nx.draw_networkx_edges(graph, layout_pos, ax=ax, node_size=3000)
     edge_labels = nx.get_edge_attributes(graph, 'capacity')
-    nx.draw_networkx_edge_labels(graph, layout_pos, edge_labels=edge_labels)
+    nx.draw_networkx_edge_labels(graph, layout_pos, edge_labels=edge_labels, ax=ax)
 
     if path_edges:
         path_color = plt.cm.viridis(step / 10)
-        nx.draw_networkx_edges(graph, layout_pos, edgelist=path_edges, width=3, edge_color=[path_color], alpha=0.7)
+        nx.draw_networkx_edges(graph, layout_pos, edgelist=path_edges, ax=ax, node_size=3000, width=3, edge_color=[path_color], alpha=0.7)
+
+    ax.set_axis_off()
+    ax.set_title(f"Flow Network - Step {step}")
 
-    plt.title(f"Flow Network - Step {step}")
+def render_step(index):
+    graph, path_edges, step = snapshots[index]
+    return render_frame(lambda ax: draw_step(ax, graph, path_edges, step))
 
-def next_graph(canvas, figure, result_label):
+# Show a pre-rendered step and let the prefetcher move on to the ones around it
+def show_step(display, index):
+    image = frame_image(prefetcher.frame(index))
+    display.configure(image=image)
+    display.image = image  # Tk drops the image unless a reference is kept
+    prefetcher.focus(index)
+
+def next_graph(display, result_label):
     global current_step
     if current_step < len(snapshots):
-        graph, path_edges, step = snapshots[current_step]
-        plot_graph(graph, path_edges, step)
-        canvas.draw()
+        show_step(display, current_step)
         current_step += 1
     else:
         result_label.config(text=f"Maximum Flow: {max_flow}")
         min_cut_edges = find_min_cut(snapshots[-1][0], source)
         visualize_min_cut(snapshots[-1][0], min_cut_edges)
 
+def previous_graph(display, result_label):
+    global current_step
+    if current_step > 1:
+        current_step -= 1
+        show_step(display, current_step - 1)
+        result_label.config(text="")
+
 def find_min_cut(graph, source):
     visited = set()
     queue = [source]
@@ -128,7 +147,7 @@ def visualize_min_cut(graph, min_cut_edges):
     plt.show(block=False)
 
 def visualize_ford_fulkerson():
-    global max_flow, current_step, source, layout_pos
+    global max_flow, current_step, source, layout_pos, prefetcher
     current_step = 0
     
     root = tk.Tk()
@@ -156,21 +175,26 @@ def visualize_ford_fulkerson():
     result_window = tk.Toplevel(root)
     result_window.title("Ford-Fulkerson Visualization")
 
-    figure = plt.figure(figsize=(8, 6))
-    canvas = FigureCanvasTkAgg(figure, result_window)
-    canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+    prefetcher = FramePrefetcher(render_step, len(snapshots))
+
+    display = tk.Label(result_window)
+    display.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
 
     result_label = tk.Label(result_window, text="", font=("Helvetica", 14))
     result_label.pack(pady=10)
 
-    next_button = tk.Button(result_window, text="Next", command=lambda: next_graph(canvas, figure, result_label))
-    next_button.pack(pady=10)
+    buttons = tk.Frame(result_window)
+    buttons.pack(pady=10)
+    previous_button = tk.Button(buttons, text="Previous", command=lambda: previous_graph(display, result_label))
+    previous_button.pack(side=tk.LEFT, padx=5)
+    next_button = tk.Button(buttons, text="Next", command=lambda: next_graph(display, result_label))
+    next_button.pack(side=tk.LEFT, padx=5)
 
-    plot_graph(*snapshots[current_step])
-    canvas.draw()
+    show_step(display, current_step)
     current_step += 1
 
     root.mainloop()
+    prefetcher.close()
 
 
 if __name__ == "__main__":
@@ -2,7 +2,7 @@ import tkinter as tk
 from tkinter import simpledialog, messagebox
 import networkx as nx
 import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from frame_cache import FramePrefetcher, render_frame, frame_image
 
 snapshots = []  # Store graphs for each step
 current_step = 0  # Track the current step being displayed
@@ -60,37 +60,58 @@ def dfs(graph, source, sink):
     return None
 
 
-def plot_graph(graph, flows, path_edges=None, step=0):
-    plt.clf()
-    global layout_pos  # Use the same layout for all steps
-
+# Draw one step on the given axes, with the ax-based networkx functions only so
+# the frame prefetcher can draw it off-screen. Every step uses the same layout.
+def draw_step(ax, graph, flows, path_edges=None, step=0):
     # Draw nodes and labels
-    nx.draw(graph, layout_pos, with_labels=True, node_size=3000, node_color='lightblue', font_size=12, font_weight='bold')
+    nx.draw_networkx_nodes(graph, layout_pos, ax=ax, node_size=3000, node_color='lightblue')
+    nx.draw_networkx_labels(graph, layout_pos, ax=ax, font_size=12, font_weight='bold')
+    nx.draw_networkx_edges(graph, layout_pos, ax=ax, node_size=3000)
 
     # Display flow/capacity on each edge
     edge_labels = {edge: f"{flows.get(edge, 0)}/{graph.edges[edge]['capacity']}" for edge in graph.edges}
-    nx.draw_networkx_edge_labels(graph, layout_pos, edge_labels=edge_labels, font_size=10)
+    nx.draw_networkx_edge_labels(graph, layout_pos, edge_labels=edge_labels, font_size=10, ax=ax)
 
     # Highlight the current augmenting path (if any)
     if path_edges:
-        nx.draw_networkx_edges(graph, layout_pos, edgelist=path_edges, width=3, edge_color='red', alpha=0.7)
+        nx.draw_networkx_edges(graph, layout_pos, edgelist=path_edges, ax=ax, node_size=3000, width=3, edge_color='red', alpha=0.7)
+
+    ax.set_axis_off()
+    ax.set_title(f"Flow Network - Step {step}")
+
+
+def render_step(index):
+    graph, flows, path_edges, step = snapshots[index]
+    return render_frame(lambda ax: draw_step(ax, graph, flows, path_edges, step))
+
 
-    plt.title(f"Flow Network - Step {step}")
+# Show a pre-rendered step and let the prefetcher move on to the ones around it
+def show_step(display, index):
+    image = frame_image(prefetcher.frame(index))
+    display.configure(image=image)
+    display.image = image  # Tk drops the image unless a reference is kept
+    prefetcher.focus(index)
 
 
-def next_graph(canvas, figure, result_label):
+def next_graph(display, result_label):
     global current_step
     if current_step < len(snapshots):
-        graph, flows, path_edges, step = snapshots[current_step]
-        plot_graph(graph, flows, path_edges, step)
-        canvas.draw()
+        show_step(display, current_step)
         current_step += 1
     else:
         result_label.config(text=f"Maximum Flow: {max_flow}")
 
 
+def previous_graph(display, result_label):
+    global current_step
+    if current_step > 1:
+        current_step -= 1
+        show_step(display, current_step - 1)
+        result_label.config(text="")
+
+
 def visualize_ford_fulkerson():
-    global max_flow, current_step, source, layout_pos
+    global max_flow, current_step, source, layout_pos, prefetcher
     current_step = 0
 
     root = tk.Tk()
@@ -120,21 +141,26 @@ def visualize_ford_fulkerson():
         result_window = tk.Toplevel()
         result_window.title("Ford-Fulkerson Visualization")
 
-        figure = plt.figure(figsize=(8, 6))
-        canvas = FigureCanvasTkAgg(figure, result_window)
-        canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        prefetcher = FramePrefetcher(render_step, len(snapshots))
+
+        display = tk.Label(result_window)
+        display.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
 
         result_label = tk.Label(result_window, text="", font=("Helvetica", 14))
         result_label.pack(pady=10)
 
-        next_button = tk.Button(result_window, text="Next", command=lambda: next_graph(canvas, figure, result_label))
-        next_button.pack(pady=10)
+        buttons = tk.Frame(result_window)
+        buttons.pack(pady=10)
+        previous_button = tk.Button(buttons, text="Previous", command=lambda: previous_graph(display, result_label))
+        previous_button.pack(side=tk.LEFT, padx=5)
+        next_button = tk.Button(buttons, text="Next", command=lambda: next_graph(display, result_label))
+        next_button.pack(side=tk.LEFT, padx=5)
 
-        plot_graph(*snapshots[current_step][:3])
-        canvas.draw()
+        show_step(display, current_step)
         current_step += 1
 
         result_window.mainloop()
+        prefetcher.close()
     except Exception as e:
         messagebox.showerror("Error", f"An error occurred: {e}")
         root.destroy()
@@ -0,0 +1,309 @@
+import os
+
+import numpy as np
+
+import compact
+
+# Out-of-core graphs: the CSR arrays of compact.py, plus the residual
+# capacities, live in .npy files opened as numpy.memmap. Only O(V) arrays and
+# one chunk of arcs are held in memory at a time. Nodes are renumbered in BFS
+# order from the source, so a BFS frontier maps to a contiguous run of nodes
+# and therefore of arcs, and the solver streams through the files instead of
+# jumping around them.
+
+CHUNK = 1 << 22
+
+
+def open_array(directory, name, dtype, shape):
+    return np.lib.format.open_memmap(os.path.join(directory, name + '.npy'), mode='w+',
+                                     dtype=dtype, shape=shape)
+
+
+# Positions of new arcs in the CSR arrays: each arc goes to the next free slot of its tail
+def place(tails, fill):
+    order = np.argsort(tails, kind='stable')
+    sorted_tails = tails[order]
+    nodes, first, counts = np.unique(sorted_tails, return_index=True, return_counts=True)
+    rank = np.arange(len(tails)) - np.repeat(first, counts)
+
+    position = np.empty(len(tails), dtype=np.int64)
+    position[order] = fill[sorted_tails] + rank
+    fill[nodes] += counts
+    return position
+
+
+def edge_chunks(edges, new_id, chunk):
+    for lo in range(0, len(edges), chunk):
+        block = np.asarray(edges[lo:lo + chunk], dtype=np.int64)
+        u, v, cap = block[:, 0], block[:, 1], block[:, 2]
+        keep = u != v
+        u, v, cap = u[keep], v[keep], cap[keep]
+        if new_id is not None:
+            u, v = new_id[u], new_id[v]
+        yield u, v, cap
+
+
+# Two streaming passes over the (u, v, capacity) rows: count degrees, then
+# drop every arc into its slot
+def write_csr(edges, num_nodes, directory, new_id=None, chunk=CHUNK):
+    degree = np.zeros(num_nodes, dtype=np.int64)
+    for u, v, cap in edge_chunks(edges, new_id, chunk):
+        degree += np.bincount(u, minlength=num_nodes)
+        degree += np.bincount(v, minlength=num_nodes)
+
+    num_arcs = int(degree.sum())
+    start = open_array(directory, 'start', np.int64, (num_nodes + 1,))
+    start[0] = 0
+    np.cumsum(degree, out=start[1:])
+    tail = open_array(directory, 'tail', np.int64, (num_arcs,))
+    head = open_array(directory, 'head', np.int64, (num_arcs,))
+    cap = open_array(directory, 'cap', np.int64, (num_arcs,))
+    rev = open_array(directory, 'rev', np.int64, (num_arcs,))
+    forward = open_array(directory, 'forward', bool, (num_arcs,))
+
+    fill = np.array(start[:-1])
+    for u, v, c in edge_chunks(edges, new_id, chunk):
+        k = len(u)
+        arc_tail = np.concatenate((u, v))
+        position = place(arc_tail, fill)
+        ahead, back = position[:k], position[k:]
+
+        tail[position] = arc_tail
+        head[position] = np.concatenate((v, u))
+        cap[ahead] = c
+        cap[back] = 0
+        rev[ahead] = back
+        rev[back] = ahead
+        forward[ahead] = True
+        forward[back] = False
+
+    for array in (start, tail, head, cap, rev, forward):
+        array.flush()
+
+
+# Arc indices leaving the given nodes, in groups of about chunk arcs
+def arc_groups(start, nodes, chunk=CHUNK):
+    lo = np.asarray(start[nodes])
+    counts = np.asarray(start[nodes + 1]) - lo
+    ends = np.cumsum(counts)
+    i = 0
+    while i < len(nodes):
+        j = max(i + 1, int(np.searchsorted(ends, (ends[i - 1] if i else 0) + chunk, side='right')))
+        group_counts = counts[i:j]
+        offsets = np.cumsum(group_counts) - group_counts
+        yield np.arange(group_counts.sum()) + np.repeat(lo[i:j] - offsets, group_counts)
+        i = j
+
+
+# New node numbers in BFS order from root, ignoring arc direction
+def bfs_order(start, head, num_nodes, root, chunk=CHUNK):
+    new_id = np.full(num_nodes, -1, dtype=np.int64)
+    new_id[root] = 0
+    count = 1
+    frontier = np.array([root], dtype=np.int64)
+
+    while len(frontier):
+        reached = []
+        for arcs in arc_groups(start, frontier, chunk):
+            nodes = np.unique(np.asarray(head[arcs]))
+            nodes = nodes[new_id[nodes] < 0]
+            new_id[nodes] = np.arange(count, count + len(nodes))
+            count += len(nodes)
+            reached.append(nodes)
+        frontier = np.concatenate(reached)
+
+    unreached = np.flatnonzero(new_id < 0)
+    new_id[unreached] = np.arange(count, count + len(unreached))
+    return new_id
+
+
+# Build the on-disk graph from an (E, 3) array of u, v, capacity rows, itself
+# usually a memmap, e.g. np.load('edges.npy', mmap_mode='r'). Nodes are
+# 0..num_nodes-1; with reorder they are renumbered in BFS order from source.
+def build_memmap_graph(edges, num_nodes, directory, source=0, reorder=True, chunk=CHUNK):
+    os.makedirs(directory, exist_ok=True)
+    new_id = np.arange(num_nodes, dtype=np.int64)
+
+    if reorder:
+        write_csr(edges, num_nodes, directory, chunk=chunk)
+        start = np.load(os.path.join(directory, 'start.npy'), mmap_mode='r')
+        head = np.load(os.path.join(directory, 'head.npy'), mmap_mode='r')
+        new_id = bfs_order(start, head, num_nodes, source, chunk)
+        del start, head
+    write_csr(edges, num_nodes, directory, new_id if reorder else None, chunk)
+
+    # labels maps new numbers back to the input ones, new_id the other way
+    labels = open_array(directory, 'labels', np.int64, (num_nodes,))
+    labels[new_id] = np.arange(num_nodes)
+    labels.flush()
+    np.save(os.path.join(directory, 'new_id.npy'), new_id)
+
+
+def open_memmap_graph(directory):
+    return compact.load(directory, mmap_mode='r'), np.load(os.path.join(directory, 'new_id.npy'), mmap_mode='r')
+
+
+# Residual capacities in their own file, reset to the capacities
+def open_residual(cg, directory, chunk=CHUNK):
+    res = open_array(directory, 'res', np.int64, cg.cap.shape)
+    for lo in range(0, len(res), chunk):
+        res[lo:lo + chunk] = cg.cap[lo:lo + chunk]
+    return res
+
+
+# Nodes reachable from s along arcs with residual capacity; parent holds the arc
+# each node was first reached by, -2 for s and -1 for unreached nodes
+def residual_bfs(cg, res, s, t=None, chunk=CHUNK):
+    parent = np.full(cg.num_nodes, -1, dtype=np.int64)
+    parent[s] = -2
+    frontier = np.array([s], dtype=np.int64)
+
+    while len(frontier) and (t is None or parent[t] == -1):
+        reached = []
+        for arcs in arc_groups(cg.start, frontier, chunk):
+            arcs = arcs[np.asarray(res[arcs]) > 0]
+            nodes = np.asarray(cg.head[arcs])
+            fresh = parent[nodes] == -1
+            nodes, first = np.unique(nodes[fresh], return_index=True)
+            parent[nodes] = arcs[fresh][first]
+            reached.append(nodes)
+        frontier = np.concatenate(reached)
+    return parent
+
+
+# BFS levels from s along arcs with residual capacity, -1 for unreached nodes.
+# Stops after the level that reaches t.
+def residual_levels(cg, res, s, t, chunk=CHUNK):
+    level = np.full(cg.num_nodes, -1, dtype=np.int64)
+    level[s] = 0
+    depth = 0
+    frontier = np.array([s], dtype=np.int64)
+
+    while len(frontier) and level[t] == -1:
+        depth += 1
+        reached = []
+        for arcs in arc_groups(cg.start, frontier, chunk):
+            arcs = arcs[np.asarray(res[arcs]) > 0]
+            nodes = np.unique(np.asarray(cg.head[arcs]))
+            nodes = nodes[level[nodes] == -1]
+            level[nodes] = depth
+            reached.append(nodes)
+        frontier = np.concatenate(reached)
+    return level
+
+
+# Push each tail's excess over the given arcs out of it, filling them in order
+# up to room. The arcs come grouped by tail with every arc of a tail in the
+# same call. Returns the arcs used and the amounts pushed.
+def push_grouped(cg, res, excess, arcs, tails, heads, room):
+    before = np.cumsum(room) - room  # Room on the tail's earlier arcs
+    first = np.r_[True, tails[1:] != tails[:-1]]
+    before -= before[first][np.cumsum(first) - 1]
+    pushed = np.clip(excess[tails] - before, 0, room)
+
+    moved = pushed > 0
+    arcs, tails, heads, pushed = arcs[moved], tails[moved], heads[moved], pushed[moved]
+    res[arcs] = np.asarray(res[arcs]) - pushed
+    back = np.asarray(cg.rev[arcs])
+    res[back] = np.asarray(res[back]) + pushed
+    np.subtract.at(excess, tails, pushed)
+    np.add.at(excess, heads, pushed)
+    return arcs, back, pushed
+
+
+# Forward wave step: push the excess of nodes into the heads wanted(heads)
+# accepts, recording in sent what each arc carried this phase
+def push_forward(cg, res, sent, excess, nodes, wanted, chunk):
+    for arcs in arc_groups(cg.start, nodes, chunk):
+        tails, heads = np.asarray(cg.tail[arcs]), np.asarray(cg.head[arcs])
+        residual = np.asarray(res[arcs])
+        keep = (residual > 0) & wanted(heads)
+        if np.any(keep):
+            arcs, back, pushed = push_grouped(cg, res, excess, arcs[keep], tails[keep], heads[keep],
+                                              residual[keep])
+            sent[arcs] = np.asarray(sent[arcs]) + pushed
+
+
+# Backward wave step: send the excess of nodes back down the arcs that brought
+# it this phase, to the level below
+def push_back(cg, res, sent, excess, nodes, level, chunk):
+    for arcs in arc_groups(cg.start, nodes, chunk):
+        tails, heads = np.asarray(cg.tail[arcs]), np.asarray(cg.head[arcs])
+        came = np.asarray(sent[np.asarray(cg.rev[arcs])])
+        keep = (came > 0) & (level[heads] == level[tails] - 1)
+        if np.any(keep):
+            arcs, back, pushed = push_grouped(cg, res, excess, arcs[keep], tails[keep], heads[keep],
+                                              came[keep])
+            sent[back] = np.asarray(sent[back]) - pushed
+
+
+# Dinic phases with a blocking flow found in waves over the BFS layers
+# (Karzanov's scheme) instead of one augmenting path at a time. A forward wave
+# pushes excess layer by layer from the source towards the sink; a node left
+# with excess is blocked for the rest of the phase, and the backward wave
+# returns its excess one layer down along the arcs that brought it. Each wave
+# blocks a node, and every wave only reads the arcs of nodes holding excess, so
+# passes over the files grow with phases and waves, not augmenting paths.
+# sent holds what each arc carried in the current phase, a file next to res
+# for memory-mapped residuals. In RAM are O(V) arrays and one chunk of arcs.
+def memmap_dinic(cg, s, t, res, chunk=CHUNK, sent=None):
+    if sent is None:
+        sent = np.zeros(len(res), dtype=np.int64)
+    flow = 0
+    excess = np.zeros(cg.num_nodes, dtype=np.int64)
+    while s != t:
+        level = residual_levels(cg, res, s, t, chunk)
+        top = int(level[t])
+        if top == -1:  # No augmenting path found
+            break
+
+        below = np.flatnonzero((level >= 0) & (level < top))
+        below = below[np.argsort(level[below], kind='stable')]
+        bounds = np.searchsorted(level[below], np.arange(top + 1))
+        layers = [below[bounds[k]:bounds[k + 1]] for k in range(top)]
+        blocked = np.zeros(cg.num_nodes, dtype=bool)
+        excess[s] = np.iinfo(np.int64).max // 4
+
+        while True:
+            for k in range(top):
+                nodes = layers[k][excess[layers[k]] > 0]
+                if k + 1 == top:
+                    push_forward(cg, res, sent, excess, nodes, lambda heads: heads == t, chunk)
+                else:
+                    push_forward(cg, res, sent, excess, nodes,
+                                 lambda heads: (level[heads] == k + 1) & ~blocked[heads], chunk)
+                if k:
+                    blocked[nodes[excess[nodes] > 0]] = True
+
+            if not np.any(excess[blocked] > 0):
+                break
+            for k in range(top - 1, 0, -1):
+                nodes = layers[k][blocked[layers[k]] & (excess[layers[k]] > 0)]
+                push_back(cg, res, sent, excess, nodes, level, chunk)
+
+        flow += int(excess[t])
+        excess[s] = excess[t] = 0
+        for lo in range(0, len(sent), chunk):
+            sent[lo:lo + chunk] = 0
+    return flow
+
+
+# Max flow and min-cut edges of a graph written by build_memmap_graph, with
+# source and sink given in the input numbering
+def memmap_max_flow(directory, source, sink, chunk=CHUNK):
+    cg, new_id = open_memmap_graph(directory)
+    s, t = int(new_id[source]), int(new_id[sink])
+    res = open_residual(cg, directory, chunk)
+    sent = open_array(directory, 'sent', np.int64, res.shape)
+    flow = memmap_dinic(cg, s, t, res, chunk, sent)
+
+    side = residual_bfs(cg, res, s, chunk=chunk) != -1
+    min_cut_edges = []
+    for lo in range(0, len(res), chunk):
+        tails = np.asarray(cg.tail[lo:lo + chunk])
+        heads = np.asarray(cg.head[lo:lo + chunk])
+        cut = np.asarray(cg.forward[lo:lo + chunk]) & side[tails] & ~side[heads]
+        min_cut_edges.extend(zip(cg.labels[tails[cut]].tolist(),
+                                 cg.labels[heads[cut]].tolist()))
+    res.flush()
+    return flow, min_cut_edges
@@ -0,0 +1,171 @@
+from fractions import Fraction
+
+import numpy as np
+
+import compact
+import engines
+
+# Parametric max flow: edges out of the source and into the sink get capacity
+# base + slope * lam, with slope >= 0 out of the source and <= 0 into the sink
+# (the Gallo-Grigoriadis-Tarjan setting). The max flow is then a concave
+# piecewise-linear function of lam and the minimal min cuts are nested, their
+# source sides growing with lam.
+#
+# Breakpoints are found directly: the cut lines found at the two ends of an
+# interval are intersected and the flow solved there. Either the flow meets
+# the lines, and the intersection is the one breakpoint of the interval, or the
+# solve yields a new cut and both halves are searched. That takes about two
+# solves per breakpoint, each warm-started from the flow at the lower end, so
+# the whole curve costs little more than a single solve when there are few
+# breakpoints. Everything is computed with exact fractions.
+
+
+# Flow state at one value of lam
+class State:
+    def __init__(self, lam, value, res, line, side):
+        self.lam = lam
+        self.value = value
+        self.res = res
+        self.line = line  # (constant, slope) of the minimal min cut's capacity in lam
+        self.side = side  # Its source side as a boolean array
+
+
+class ParametricNetwork:
+    def __init__(self, graph, source, sink, slopes=None, engine='auto'):
+        self.cg = cg = compact.from_networkx(graph)
+        self.s, self.t = s, t = cg.index[source], cg.index[sink]
+        if engine == 'auto':
+            engine = engines.choose_engine(engines.graph_stats(cg, s, t))
+        self.engine = engine
+
+        # By default every source edge scales with lam: capacity * lam
+        forward = np.flatnonzero(cg.forward)
+        self.base = [Fraction(int(c)) for c in cg.cap.tolist()]
+        self.slope = [Fraction(0)] * len(self.base)
+        arc_of = {(cg.labels[cg.tail[a]], cg.labels[cg.head[a]]): int(a) for a in forward}
+        if slopes is None:
+            slopes = {(source, v): graph[source][v]['capacity'] for v in graph.successors(source)}
+            for edge in slopes:
+                self.base[arc_of[edge]] = Fraction(0)
+
+        for edge, slope in slopes.items():
+            if edge not in arc_of:
+                raise ValueError(f"{edge} is not an edge of the graph")
+            u, v = edge
+            if not ((u == source and slope >= 0) or (v == sink and slope <= 0)):
+                raise ValueError(f"slope of {edge} must be >= 0 out of the source or <= 0 into the sink")
+            self.slope[arc_of[edge]] = Fraction(slope)
+        self.sloped = [a for a in forward.tolist() if self.slope[a] != 0]
+
+    def capacity(self, a, lam):
+        return self.base[a] + self.slope[a] * lam
+
+    def check_range(self, lam):
+        for a in self.sloped:
+            if self.capacity(a, lam) < 0:
+                raise ValueError(f"capacity of edge {self.edge(a)} is negative at lam={lam}")
+
+    def edge(self, a):
+        return self.cg.labels[self.cg.tail[a]], self.cg.labels[self.cg.head[a]]
+
+    def finish(self, lam, value, res):
+        cg = self.cg
+        flow, res = engines.solve(cg, self.s, self.t, self.engine, res)
+        side = compact.source_side(cg, res, self.s)
+        cut = np.flatnonzero(cg.forward & side[cg.tail] & ~side[cg.head]).tolist()
+        line = (sum(self.base[a] for a in cut), sum(self.slope[a] for a in cut))
+        return State(lam, value + flow, res, line, side)
+
+    def solve(self, lam):
+        self.check_range(lam)
+        res = [self.capacity(a, lam) if self.cg.forward[a] else Fraction(0) for a in range(len(self.base))]
+        return self.finish(lam, 0, res)
+
+    # Solve at a larger lam starting from the flow of an earlier state: source
+    # edges only gain capacity, flow over the lowered sink edges is pushed back
+    def solve_from(self, state, lam):
+        res = list(state.res)
+        value = state.value
+        for a in self.sloped:
+            old, new = self.capacity(a, state.lam), self.capacity(a, lam)
+            if new >= old:
+                res[a] += new - old
+            else:
+                value -= compact.reduce_capacity(self.cg, res, a, new, self.s, self.t)
+        return self.finish(lam, value, res)
+
+    # Segments (start, end, state whose cut is minimal on the whole segment) covering [low.lam, high.lam]
+    def segments(self, low, high):
+        (a_low, b_low), (a_high, b_high) = low.line, high.line
+        if low.line == high.line:
+            return [(low.lam, high.lam, low)]
+        lam = (a_high - a_low) / (b_low - b_high)
+        if lam <= low.lam:
+            return [(low.lam, high.lam, high)]
+        if lam >= high.lam:
+            return [(low.lam, high.lam, low)]
+
+        middle = self.solve_from(low, lam)
+        if middle.value == a_low + b_low * lam:
+            return [(low.lam, lam, low), (lam, high.lam, high)]
+        return self.segments(low, middle) + self.segments(middle, high)
+
+
+# Max flow as a function of lam over [lam_low, lam_high]. slopes maps edges out
+# of the source or into the sink to how fast their capacity changes with lam,
+# their "capacity" attribute being the value at lam = 0; by default every
+# source edge is scaled, capacity * lam. Returns a dict with
+#   breakpoints  values of lam where the slope of the max flow changes
+#   curve        (lam, max flow) at lam_low, every breakpoint and lam_high
+#   segments     (start, end, source side, min-cut edges) for each linear piece,
+#                the source sides nested and growing with lam
+def parametric_max_flow(graph, source, sink, lam_low, lam_high, slopes=None, engine='auto'):
+    network = ParametricNetwork(graph, source, sink, slopes, engine)
+    lam_low, lam_high = Fraction(lam_low), Fraction(lam_high)
+    network.check_range(lam_high)
+    low = network.solve(lam_low)
+    high = network.solve_from(low, lam_high) if lam_high > lam_low else low
+
+    # Merge neighbouring pieces that share a cut line
+    pieces = []
+    for start, end, state in network.segments(low, high):
+        if pieces and pieces[-1][2].line == state.line:
+            pieces[-1] = (pieces[-1][0], end, pieces[-1][2])
+        else:
+            pieces.append((start, end, state))
+
+    cg = network.cg
+    curve = [(lam_low, low.value)]
+    segments = []
+    for start, end, state in pieces:
+        constant, slope = state.line
+        curve.append((end, constant + slope * end))
+        side = [cg.labels[v] for v in np.flatnonzero(state.side)]
+        cut = np.flatnonzero(cg.forward & state.side[cg.tail] & ~state.side[cg.head])
+        segments.append((start, end, side, [network.edge(a) for a in cut]))
+
+    return {
+        'breakpoints': [end for start, end, state in pieces[:-1]],
+        'curve': curve,
+        'segments': segments,
+    }
+
+
+# Max flow at lam read off the curve, by linear interpolation between its points
+def flow_at(result, lam):
+    curve = result['curve']
+    lam = Fraction(lam)
+    if not curve[0][0] <= lam <= curve[-1][0]:
+        raise ValueError(f"lam={lam} is outside [{curve[0][0]}, {curve[-1][0]}]")
+    for (lam_a, value_a), (lam_b, value_b) in zip(curve, curve[1:]):
+        if lam <= lam_b:
+            if lam_b == lam_a:
+                return value_b
+            return value_a + (value_b - value_a) * (lam - lam_a) / (lam_b - lam_a)
+    return curve[-1][1]
+
+
+# Max flow for each lam in lambdas, from one parametric solve over their range
+def parametric_sweep(graph, source, sink, lambdas, slopes=None, engine='auto'):
+    result = parametric_max_flow(graph, source, sink, min(lambdas), max(lambdas), slopes, engine)
+    return [flow_at(result, lam) for lam in lambdas]
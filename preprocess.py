@@ -0,0 +1,161 @@
+import networkx as nx
+
+from engines import max_flow
+
+# Every edge of the reduced graph expands to a part of the original graph:
+#   ('edge', (u, v), cap)       a single original edge
+#   ('series', [parts], cap)    a contracted chain, capacity is the chain minimum
+#   ('parallel', [parts], cap)  merged parallel edges, capacity is the sum
+
+
+# Build the input graph, summing the capacities of repeated edges instead of overwriting them
+def build_graph(nodes, edges_input):
+    graph = nx.DiGraph()
+    for node in nodes:
+        graph.add_node(node.strip())
+
+    for edge in edges_input.split(','):
+        u, v, cap = edge.split('-')
+        u, v = u.strip(), v.strip()
+        if graph.has_edge(u, v):
+            graph[u][v]['capacity'] += int(cap)
+        else:
+            graph.add_edge(u, v, capacity=int(cap))
+    return graph
+
+
+# Nodes reachable from start, following neighbors(node) along edges with capacity
+def reachable(graph, start, neighbors, forward=True):
+    visited = {start}
+    stack = [start]
+
+    while stack:
+        u = stack.pop()
+        for v in neighbors(u):
+            cap = graph[u][v]['capacity'] if forward else graph[v][u]['capacity']
+            if v not in visited and cap > 0:
+                visited.add(v)
+                stack.append(v)
+    return visited
+
+
+# Drop nodes that are not on any source-sink path, contract chains of
+# degree-2 nodes and merge the parallel edges this creates
+def preprocess_graph(graph, source, sink):
+    forward = reachable(graph, source, graph.successors)
+    backward = reachable(graph, sink, graph.predecessors, forward=False)
+    keep = forward & backward
+
+    reduced = nx.DiGraph()
+    reduced.add_nodes_from((source, sink))
+    expansion = {}
+
+    for u, v, cap in graph.edges(data='capacity'):
+        if u in keep and v in keep and u != v and cap > 0:
+            reduced.add_edge(u, v, capacity=cap)
+            expansion[(u, v)] = ('edge', (u, v), cap)
+
+    queue = [node for node in reduced if node not in (source, sink)]
+    while queue:
+        x = queue.pop()
+        if x not in reduced or x in (source, sink):
+            continue
+        if reduced.in_degree(x) != 1 or reduced.out_degree(x) != 1:
+            continue
+
+        u = next(iter(reduced.predecessors(x)))
+        v = next(iter(reduced.successors(x)))
+        first = expansion.pop((u, x))
+        second = expansion.pop((x, v))
+        reduced.remove_node(x)
+        queue.append(u)
+
+        # x only leads back to u, so nothing that enters it can reach the sink
+        if u == v:
+            continue
+
+        parts = []
+        for part in (first, second):
+            parts.extend(part[1] if part[0] == 'series' else [part])
+        chain = ('series', parts, min(first[2], second[2]))
+
+        if reduced.has_edge(u, v):
+            other = expansion[(u, v)]
+            merged = (other[1] if other[0] == 'parallel' else [other]) + [chain]
+            reduced[u][v]['capacity'] += chain[2]
+            expansion[(u, v)] = ('parallel', merged, reduced[u][v]['capacity'])
+        else:
+            reduced.add_edge(u, v, capacity=chain[2])
+            expansion[(u, v)] = chain
+        queue.append(v)
+
+    return reduced, expansion
+
+
+# Flow on every original edge, read off the residual graph returned by ford_fulkerson
+def flows_from_residual(graph, residual_graph):
+    flows = {}
+    for u, v, cap in graph.edges(data='capacity'):
+        if residual_graph.has_edge(u, v):
+            flows[(u, v)] = max(0, cap - residual_graph[u][v]['capacity'])
+        else:
+            flows[(u, v)] = 0
+    return flows
+
+
+# Spread the flow of each reduced edge over the original edges it stands for
+def expand_flows(graph, expansion, reduced_flows):
+    flows = {edge: 0 for edge in graph.edges}
+    stack = [(expansion[edge], amount) for edge, amount in reduced_flows.items()
+             if edge in expansion and amount > 0]
+
+    while stack:
+        (kind, body, cap), amount = stack.pop()
+        if kind == 'edge':
+            flows[body] += amount
+        elif kind == 'series':
+            stack.extend((part, amount) for part in body)
+        else:
+            # Fill the merged edges one after another
+            for part in body:
+                share = min(amount, part[2])
+                if share > 0:
+                    stack.append((part, share))
+                amount -= share
+    return flows
+
+
+# Source side of the min cut: the nodes the source reaches in the residual
+# network of a maximum flow, over unsaturated edges and back along edges with flow
+def cut_side(graph, flows, source):
+    visited = {source}
+    stack = [source]
+
+    while stack:
+        u = stack.pop()
+        reach = [v for v in graph.successors(u) if graph[u][v]['capacity'] - flows[(u, v)] > 0]
+        reach += [w for w in graph.predecessors(u) if flows[(w, u)] > 0]
+        for v in reach:
+            if v not in visited:
+                visited.add(v)
+                stack.append(v)
+    return visited
+
+
+# Min cut in the find_min_cut format: every edge from the source side to the
+# rest, zero-capacity ones included
+def min_cut_from_flows(graph, flows, source):
+    side = cut_side(graph, flows, source)
+    return [(u, v) for u, v in graph.edges if u in side and v not in side]
+
+
+# Solve on the reduced graph, map the flows back to the original one and read
+# the min cut off the original graph, so edges dropped by the reduction that
+# cross the cut (zero-capacity ones) are listed like find_min_cut lists them.
+# solver is anything returning (flow, residual graph) like ford_fulkerson.
+def solve_preprocessed(graph, source, sink, solver=max_flow):
+    reduced, expansion = preprocess_graph(graph, source, sink)
+    flow, residual_graph = solver(reduced, source, sink)
+
+    flows = expand_flows(graph, expansion, flows_from_residual(reduced, residual_graph))
+    return flow, flows, min_cut_from_flows(graph, flows, source)
@@ -0,0 +1,175 @@
+import hashlib
+import os
+import pickle
+import time
+from collections import OrderedDict
+
+from engines import max_flow
+from preprocess import flows_from_residual, min_cut_from_flows
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'max_flow')
+RESCAN_PUTS = 1000  # Puts between directory scans while under budget
+STALE_TMP_SECONDS = 3600  # Age after which a temporary file is from a dead writer
+
+
+# Hash of the network and the query, independent of the order edges were added in
+def graph_key(graph, source, sink, engine):
+    edges = sorted((repr(u), repr(v), repr(cap)) for u, v, cap in graph.edges(data='capacity'))
+    nodes = sorted(repr(node) for node in graph.nodes)
+
+    digest = hashlib.sha256()
+    digest.update(repr((nodes, edges, repr(source), repr(sink), engine)).encode())
+    return digest.hexdigest()
+
+
+# Results on disk, one pickle per key, evicted least recently used first once
+# the directory grows past max_bytes. The directory is shared by every process
+# using it, so lookups and eviction always go by what is on disk, with file
+# mtimes recording the last access. A small in-process memo sits in front.
+# Scanning the directory costs a stat per entry, so each process keeps an
+# estimate of its size, growing with its own writes, and only scans when the
+# estimate passes max_bytes or every RESCAN_PUTS writes to catch up with the
+# others. Eviction goes down to nine tenths of max_bytes so the next scan is
+# not due right away.
+class ResultCache:
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=256 * 2**20, memory_items=128):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self.memory = OrderedDict()
+        self.estimated_bytes = None  # Unknown until the first scan
+        self.puts_since_scan = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, key + '.pickle')
+
+    # (last access, size, key) of the entries on disk, oldest access first.
+    # Temporary files left by writers that died mid-write are removed.
+    def entries(self):
+        found = []
+        stale = time.time() - STALE_TMP_SECONDS
+        for entry in os.scandir(self.directory):
+            try:
+                info = entry.stat()
+            except OSError:  # Removed by another process meanwhile
+                continue
+            if entry.name.endswith('.pickle'):
+                found.append((info.st_mtime, info.st_size, entry.name[:-len('.pickle')]))
+            elif entry.name.endswith('.tmp') and info.st_mtime < stale:
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+        found.sort()
+        return found
+
+    def remember(self, key, result):
+        self.memory[key] = result
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_items:
+            self.memory.popitem(last=False)
+
+    def get(self, key):
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return self.memory[key]
+
+        try:
+            with open(self.path(key), 'rb') as f:
+                result = pickle.load(f)
+            os.utime(self.path(key))  # mtime records the last access across processes
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError):
+            self.discard(key)
+            return None
+
+        self.remember(key, result)
+        return result
+
+    def put(self, key, result):
+        data = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        self.remember(key, result)
+        if len(data) > self.max_bytes:
+            return
+
+        # Write to a temporary file first so readers never see half an entry
+        tmp_path = f"{self.path(key)}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, self.path(key))
+
+        self.puts_since_scan += 1
+        if self.estimated_bytes is not None:
+            self.estimated_bytes += len(data)
+        if (self.estimated_bytes is None or self.estimated_bytes > self.max_bytes
+                or self.puts_since_scan >= RESCAN_PUTS):
+            self.evict()
+
+    # Scan the directory and drop the least recently used entries once it is
+    # past max_bytes, down to nine tenths of it
+    def evict(self):
+        entries = self.entries()
+        total_bytes = sum(size for mtime, size, key in entries)
+        if total_bytes > self.max_bytes:
+            for mtime, size, key in entries:
+                if total_bytes <= self.max_bytes * 9 // 10:
+                    break
+                self.discard(key)
+                total_bytes -= size
+        self.estimated_bytes = total_bytes
+        self.puts_since_scan = 0
+
+    def discard(self, key):
+        self.memory.pop(key, None)
+        try:
+            os.remove(self.path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        for mtime, size, key in self.entries():
+            self.discard(key)
+        self.memory.clear()
+        self.estimated_bytes = 0
+
+
+default_cache = None
+
+
+def get_default_cache():
+    global default_cache
+    if default_cache is None:
+        default_cache = ResultCache()
+    return default_cache
+
+
+# engines.max_flow, or any solver returning (flow, residual graph) like
+# ford_fulkerson, behind the cache. A solver is part of the key in place of the
+# engine, so its results never stand in for an engine's. Pass a precomputed key
+# to skip hashing the graph when the same network is queried over and over.
+def cached_max_flow(graph, source, sink, engine='auto', solver=None,
+                    cache=None, with_flows=False, key=None):
+    if cache is None:
+        cache = get_default_cache()
+    if key is None:
+        method = engine if solver is None else f"solver:{solver.__module__}.{solver.__qualname__}"
+        key = graph_key(graph, source, sink, method)
+
+    result = cache.get(key)
+    if result is not None and (not with_flows or result['flows'] is not None):
+        return result['max_flow'], result['min_cut'], result['flows']
+
+    if solver is None:
+        flow, residual_graph = max_flow(graph, source, sink, engine)
+    else:
+        flow, residual_graph = solver(graph, source, sink)
+    flows = flows_from_residual(graph, residual_graph)
+    result = {
+        'max_flow': flow,
+        'min_cut': min_cut_from_flows(graph, flows, source),
+        'flows': flows if with_flows else None,
+    }
+    cache.put(key, result)
+    return result['max_flow'], result['min_cut'], result['flows']
@@ -0,0 +1,115 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import compact
+import engines
+
+# Max flow after removing or de-rating each edge in turn. Edges whose answer
+# follows from the base solution are settled without solving:
+#   - the edge's base flow still fits under its new capacity: the flow is unchanged
+#   - the edge is in the min cut: that cut loses (cap - new cap), and taking the
+#     same amount off the base flow on this saturated edge stays feasible, so
+#     the new max flow is exactly base flow - (cap - new cap)
+# The rest are solved in worker processes that attach to the graph arrays in
+# shared memory and warm-start from the base flow.
+
+worker_state = {}
+
+
+# Copy arrays into shared memory blocks, returns the blocks and what a worker needs to attach
+def share_arrays(arrays):
+    blocks, layout = [], {}
+    for name, array in arrays.items():
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, array.dtype, buffer=block.buf)[:] = array
+        blocks.append(block)
+        layout[name] = (block.name, array.shape, array.dtype.str)
+    return blocks, layout
+
+
+def attach_worker(layout, s, t, engine):
+    arrays = {}
+    for name, (block_name, shape, dtype) in layout.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        worker_state.setdefault('blocks', []).append(block)
+        arrays[name] = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+
+    num_nodes = len(arrays['start']) - 1
+    worker_state['cg'] = compact.CompactGraph(range(num_nodes), *(arrays[name] for name in compact.ARRAYS))
+    worker_state['res'] = arrays['res'].tolist()
+    worker_state['query'] = (s, t, engine)
+
+
+# Re-solve with each arc de-rated, starting from the base flow every time
+def solve_derated(cg, base_res, base_flow, s, t, engine, arcs, new_caps):
+    results = []
+    for a, new_cap in zip(arcs, new_caps):
+        res = list(base_res)
+        dropped = compact.reduce_capacity(cg, res, a, new_cap, s, t)
+        flow, res = engines.solve(cg, s, t, engine, res)
+        results.append((a, base_flow - dropped + flow))
+    return results
+
+
+def solve_in_worker(arcs, new_caps, base_flow):
+    s, t, engine = worker_state['query']
+    return solve_derated(worker_state['cg'], worker_state['res'], base_flow, s, t, engine, arcs, new_caps)
+
+
+# Max flow with each edge's capacity scaled by derate (0 removes the edge).
+# Returns the base max flow and a dict from edge to the max flow without it.
+def edge_criticality(graph, source, sink, derate=0.0, engine='auto', workers=None, chunk_size=None):
+    cg = compact.from_networkx(graph)
+    s, t = cg.index[source], cg.index[sink]
+    if engine == 'auto':
+        engine = engines.choose_engine(engines.graph_stats(cg, s, t))
+    base_flow, base_res = engines.solve(cg, s, t, engine)
+
+    res = np.asarray(base_res, dtype=np.int64)
+    forward = np.flatnonzero(cg.forward)
+    flow = cg.cap[forward] - res[forward]
+    new_cap = np.floor(cg.cap[forward] * derate).astype(np.int64)
+    in_cut = np.isin(forward, compact.min_cut_arcs(cg, base_res, s))
+
+    results = np.full(len(forward), base_flow, dtype=np.int64)
+    results[in_cut] = base_flow - (cg.cap[forward] - new_cap)[in_cut]
+    todo = np.flatnonzero(~in_cut & (flow > new_cap))
+
+    if workers is None:
+        workers = min(os.cpu_count() or 1, len(todo))
+    if workers <= 1 or len(todo) < 2:
+        solved = solve_derated(cg, base_res, base_flow, s, t, engine,
+                               forward[todo].tolist(), new_cap[todo].tolist())
+    else:
+        solved = solve_in_pool(cg, res, base_flow, s, t, engine, forward[todo], new_cap[todo],
+                               workers, chunk_size)
+
+    position = {a: i for i, a in zip(todo.tolist(), forward[todo].tolist())}
+    for a, value in solved:
+        results[position[a]] = value
+
+    edges = [(cg.labels[cg.tail[a]], cg.labels[cg.head[a]]) for a in forward]
+    return base_flow, dict(zip(edges, results.tolist()))
+
+
+def solve_in_pool(cg, res, base_flow, s, t, engine, arcs, new_caps, workers, chunk_size):
+    arrays = {name: getattr(cg, name) for name in compact.ARRAYS}
+    arrays['res'] = res
+    blocks, layout = share_arrays(arrays)
+
+    if chunk_size is None:
+        chunk_size = max(1, len(arcs) // (workers * 4))
+    try:
+        with ProcessPoolExecutor(workers, initializer=attach_worker,
+                                 initargs=(layout, s, t, engine)) as pool:
+            futures = [pool.submit(solve_in_worker, arcs[i:i + chunk_size].tolist(),
+                                   new_caps[i:i + chunk_size].tolist(), base_flow)
+                       for i in range(0, len(arcs), chunk_size)]
+            return [result for future in futures for result in future.result()]
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
@@ -0,0 +1,62 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import maximum_flow
+
+import compact
+
+# scipy.sparse.csgraph.maximum_flow as a max-flow engine. The residual network
+# is handed to the compiled solver as a sparse capacity matrix, and the flow it
+# returns between each pair of nodes is spread back over the arcs joining them,
+# so callers get residual capacities like from every other engine. This module
+# needs scipy; engines.py only registers it when the import works.
+
+INT32_MAX = np.iinfo(np.int32).max
+
+
+# Same signature and result as the other engines. The compiled solver works in
+# int32, so residual capacities that are not machine integers (the exact
+# fractions of parametric.py) or whose sums do not fit are left to dinic.
+def csgraph_max_flow(cg, s, t, res=None, method='dinic'):
+    res = cg.cap.copy() if res is None else np.asarray(res)
+    if s == t:
+        return 0, res.tolist()
+    if res.dtype.kind not in 'iu':
+        return compact.dinic(cg, s, t, list(res))
+    live = np.flatnonzero(res > 0)
+    n = cg.num_nodes
+
+    # Arcs joining the same pair of nodes become one matrix entry
+    matrix = csr_matrix((res[live].astype(np.int64), (cg.tail[live], cg.head[live])), shape=(n, n))
+    matrix.sum_duplicates()
+    if matrix.nnz and (matrix.data.max() > INT32_MAX or matrix[s].sum() > INT32_MAX):
+        return compact.dinic(cg, s, t, res.tolist())
+    matrix.data = matrix.data.astype(np.int32)
+    matrix.indices = matrix.indices.astype(np.int32)
+    matrix.indptr = matrix.indptr.astype(np.int32)
+    result = maximum_flow(matrix, s, t, method=method)
+    if result.flow_value == 0:
+        return 0, res.tolist()
+
+    # Positive pair flows, spread over that pair's arcs in order of arc number
+    flow = result.flow.tocoo()
+    positive = flow.data > 0
+    pair_keys = flow.row[positive].astype(np.int64) * n + flow.col[positive]
+    pair_flows = flow.data[positive].astype(np.int64)
+    sort = np.argsort(pair_keys)
+    pair_keys, pair_flows = pair_keys[sort], pair_flows[sort]
+
+    keys = cg.tail[live] * n + cg.head[live]
+    order = np.argsort(keys, kind='stable')
+    arcs, keys = live[order], keys[order]
+    caps = res[arcs]
+    found = np.minimum(np.searchsorted(pair_keys, keys), len(pair_keys) - 1)
+    wanted = np.where(pair_keys[found] == keys, pair_flows[found], 0)
+    before = np.cumsum(caps) - caps  # Capacity of the pair's earlier arcs
+    first = np.r_[True, keys[1:] != keys[:-1]]
+    before -= before[first][np.cumsum(first) - 1]
+    pushed = np.clip(wanted - before, 0, caps)
+
+    res = res.copy()
+    res[arcs] -= pushed
+    np.add.at(res, cg.rev[arcs], pushed)
+    return int(result.flow_value), res.tolist()